@@ -0,0 +1,1007 @@
+"""
+    Benchmarks for loading and processing large synthetic games data sets.
+
+    Usage:
+        python benchmarks.py load [rows]
+        python benchmarks.py stream [rows]
+        python benchmarks.py mmap [rows]
+        python benchmarks.py snapshot [rows]
+        python benchmarks.py collection [entries]
+        python benchmarks.py numpy [rows]
+        python benchmarks.py sharded [rows]
+        python benchmarks.py lazy [rows]
+        python benchmarks.py memory [objects]
+        python benchmarks.py intern [rows]
+        python benchmarks.py rank [rows]
+        python benchmarks.py ranking [entrants]
+        python benchmarks.py dedup [rows]
+        python benchmarks.py views [rows]
+        python benchmarks.py typed [rows]
+        python benchmarks.py gc [rows]
+        python benchmarks.py index [rows]
+        python benchmarks.py datasets [rows]
+        python benchmarks.py batch [rows]
+        python benchmarks.py incremental [entrants]
+        python benchmarks.py medals [rows]
+        python benchmarks.py live [rows]
+
+    Each benchmark writes a synthetic data set to a temporary directory,
+    times the code under test and prints one line per measurement.
+"""
+
+__author__ = "Caleb Aitken, 45309414"
+__email__ = "caleb@jasa.id.au"
+
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from functools import partial
+
+import entities
+import processing
+from entities import Athlete, Result, Event, Country
+from entities import all_athletes, all_countries, all_events
+
+
+def make_dataset(directory, rows, num_athletes=None, num_events=300,
+                 num_countries=200, seed=1001):
+    """Writes a synthetic set of the five data files into 'directory'.
+
+    Parameters:
+        directory (str): Directory in which to write the data files.
+        rows (int): Total number of result rows (split between timed and
+                    scored results).
+        num_athletes (int): Number of athletes, defaults to rows // 10.
+        num_events (int): Number of events, half timed and half scored.
+        num_countries (int): Number of countries.
+        seed (int): Seed for the random number generator.
+
+    Return:
+        tuple[str]: Paths of the athletes, countries, events, timed results
+                    and scored results files, in the order taken by load_data.
+    """
+    rand = random.Random(seed)
+    num_athletes = num_athletes or max(rows // 10, 1)
+    paths = tuple(os.path.join(directory, name) for name in (
+        "athletes.csv", "countries.csv", "events.csv",
+        "timed_event_results.csv", "scored_event_results.csv"))
+    codes = ["C{:02d}".format(i) for i in range(num_countries)]
+    timed = ["Timed Event {}m".format(i) for i in range(0, num_events, 2)]
+    scored = ["Scored Event {}".format(i) for i in range(1, num_events, 2)]
+    with open(paths[1], "w") as countries:
+        for code in codes:
+            countries.write("{},Country {}\n".format(code, code))
+    with open(paths[0], "w") as athletes:
+        for identifier in range(1, num_athletes + 1):
+            athletes.write("{},First{},Surname{},{}\n".format(
+                identifier, identifier % 997, identifier % 4999,
+                rand.choice(codes)))
+    with open(paths[2], "w") as events:
+        for name in timed:
+            events.write(name + ",TIMED\n")
+        for name in scored:
+            events.write(name + ",SCORED\n")
+    for path, names, low, high in ((paths[3], timed, 30, 400),
+                                   (paths[4], scored, 0, 100)):
+        with open(path, "w") as results:
+            for _ in range(rows // 2):
+                results.write("{},{},{}\n".format(
+                    rand.randint(1, num_athletes), rand.choice(names),
+                    round(rand.uniform(low, high), 2)))
+    return paths
+
+
+def reset():
+    """Empties the global and legacy entity collections between benchmark
+       runs.
+    """
+    entities.default_dataset.clear()
+    for collection in (legacy_athletes, legacy_countries, legacy_events):
+        collection._items.clear()
+    gc.collect()
+
+
+def timed_run(function, *args, repeat=3, setup=reset):
+    """Runs function(*args) 'repeat' times and returns the best elapsed
+       seconds. 'setup' is called before each run and is not timed.
+    """
+    best = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def traced_peak(function, *args, setup=reset):
+    """Runs function(*args) and returns the peak bytes allocated by it."""
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        function(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def traced_resident(function, *args, setup=reset):
+    """Runs function(*args) and returns the bytes it left allocated,
+       including its return value.
+    """
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        kept = function(*args)
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def traced_blocks(function, *args, setup=reset):
+    """Runs function(*args) and returns the number of memory blocks it left
+       allocated, including its return value.
+    """
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        kept = function(*args)
+        return sum(statistic.count for statistic
+                   in tracemalloc.take_snapshot().statistics("filename"))
+    finally:
+        tracemalloc.stop()
+
+
+def report(name, rows, seconds):
+    """Prints a single benchmark measurement."""
+    print("{:<40} {:>10} rows {:>9.3f} s {:>12.0f} rows/s".format(
+        name, rows, seconds, rows / seconds if seconds else 0))
+
+
+class LegacyAthlete(object):
+    """The original Athlete without __slots__, kept as the baseline for
+       benchmarks.
+    """
+
+    def __init__(self, identifier, first_name, surname, country):
+        self.identifier = str(identifier)
+        self.first_name = str(first_name)
+        self.surname = str(surname)
+        self.country = country
+        self.results = {}
+        self.events = []
+
+    def add_result(self, event, result):
+        self.results[event] = result
+
+    def add_event(self, event):
+        self.events.append(event)
+
+    def get_country(self):
+        return self.country
+
+
+class LegacyResult(object):
+    """The original Result without __slots__, kept as the baseline for
+       benchmarks.
+    """
+
+    def __init__(self, result_value):
+        self.result_value = float(result_value)
+        self.place = 0
+
+
+class LegacyEvent(object):
+    """The original Event without __slots__, kept as the baseline for
+       benchmarks.
+    """
+
+    def __init__(self, event_name, timed, athletes):
+        self.event_name = str(event_name)
+        self.timed = timed == "TIMED" or timed == True
+        self.athletes = athletes
+
+    def add_athlete(self, athlete):
+        self.athletes.append(athlete)
+
+
+class LegacyCountry(object):
+    """The original Country without __slots__, kept as the baseline for
+       benchmarks.
+    """
+
+    def __init__(self, country_name, country_code):
+        self.country_name = str(country_name)
+        self.country_code = str(country_code)
+        self.athletes = []
+
+    def add_athlete(self, athlete):
+        self.athletes.append(athlete)
+
+    def get_country_code(self):
+        return self.country_code
+
+
+class LegacyManagedDictionary(object):
+    """The original ManagedDictionary, kept as the baseline for benchmarks."""
+
+    def __init__(self):
+        self._items = {}
+
+    def add_item(self, key, item):
+        self._items[key] = item
+
+    def get_items(self):
+        return list(self._items.values())
+
+    def find_item(self, key):
+        return self._items[key]
+
+
+legacy_athletes = LegacyManagedDictionary()
+legacy_countries = LegacyManagedDictionary()
+legacy_events = LegacyManagedDictionary()
+
+
+def legacy_load_data(athletes, countries, events,
+                     timed_events_results, scored_events_results):
+    """The original load_data, kept as the baseline for benchmarks. Loads the
+       original entity classes into the legacy collections.
+    """
+    with open(countries, "r") as raw_countries:
+        for row in raw_countries:
+            row = row.rstrip('\n').split(',')
+            legacy_countries.add_item(row[0], LegacyCountry(row[1], row[0]))
+    with open(athletes, "r") as raw_athletes:
+        for row in raw_athletes:
+            row = row.rstrip('\n').split(',')
+            legacy_athletes.add_item(row[0], LegacyAthlete(row[0], row[1], row[2], legacy_countries.find_item(row[3])))
+    with open(events, "r") as raw_events:
+        for row in raw_events:
+            row = row.rstrip('\n').split(',')
+            legacy_events.add_item(row[0], LegacyEvent(row[0], row[1], []))
+    for results in (timed_events_results, scored_events_results):
+        with open(results, "r") as raw_results:
+            for row in raw_results:
+                row = row.rstrip('\n').split(',')
+                legacy_events.find_item(row[1]).add_athlete(legacy_athletes.find_item(row[0]))
+                legacy_athletes.find_item(row[0]).add_event(legacy_events.find_item(row[1]))
+                legacy_athletes.find_item(row[0]).add_result(legacy_events.find_item(row[1]), LegacyResult(row[2]))
+    for athlete in legacy_athletes.get_items():
+        legacy_countries.find_item(athlete.get_country().get_country_code()).add_athlete(athlete)
+
+
+def legacy_determine_places(event):
+    """The original DeterminePlaces.process, kept as the baseline for
+       benchmarks.
+    """
+    results = []
+    for athlete in event.get_athletes():
+        results.append([athlete, athlete.get_result(event)])
+    if event.is_timed():
+        results = sorted(sorted(results, key=lambda athlete: athlete[0].get_full_name()), key=lambda result: float(result[1].get_result()))
+    else:
+        results = sorted(sorted(results, key=lambda athlete: athlete[0].get_full_name()), key=lambda result: float(result[1].get_result()), reverse=True)
+    results = [item[0] for item in results]
+    place_counter = 0
+    previous_result = Result(-1)
+    for athlete in results:
+        place_counter += 1
+        if athlete.get_result(event).get_result() == previous_result.get_result():
+            athlete.get_result(event).set_place(previous_result.get_place())
+        else:
+            athlete.get_result(event).set_place(place_counter)
+            previous_result = athlete.get_result(event)
+    return results
+
+
+def legacy_event_results(event):
+    """The string based EventResults.process, kept as the baseline for
+       benchmarks.
+    """
+    results = [[athlete.get_result(event), athlete]
+               for athlete in event.get_athletes()]
+    results = sorted(sorted(results, key=lambda athlete: athlete[1].get_full_name()), key=lambda result: int(result[0].get_place()))
+    return [item[1] for item in results]
+
+
+def legacy_athlete_results(athlete):
+    """The string based AthleteResults.process, kept as the baseline for
+       benchmarks.
+    """
+    results = [[athlete.get_result(event), event]
+               for event in athlete.get_events()]
+    results = sorted(sorted(results, key=lambda event: event[1].get_name()), key=lambda result: int(result[0].get_place()))
+    return [item[0] for item in results]
+
+
+def legacy_country_results(country):
+    """The string based medal count of CountryResults.process, kept as the
+       baseline for benchmarks.
+    """
+    medals = [0, 0, 0]
+    for athlete in country.get_athletes():
+        for event in athlete.get_events():
+            if athlete.get_result(event).get_medal() == "Gold":
+                medals[0] += 1
+            elif athlete.get_result(event).get_medal() == "Silver":
+                medals[1] += 1
+            elif athlete.get_result(event).get_medal() == "Bronze":
+                medals[2] += 1
+    return medals
+
+
+def bench_load(rows):
+    """Compares the original and single pass load_data implementations."""
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_dataset(directory, rows)
+        for name, loader in (("load_data (original)", legacy_load_data),
+                             ("load_data (single pass)", entities.load_data)):
+            report(name, rows, timed_run(loader, *paths))
+        reset()
+
+
+def consume(rows):
+    """Exhausts an iterator of rows without keeping them."""
+    for _ in rows:
+        pass
+
+
+def bench_mmap(rows):
+    """Compares line based and memory mapped reading of the results files,
+       in time, peak memory and memory blocks allocated.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_dataset(directory, rows)
+        results = paths[3:]
+        for name, reader in (("iter_results", entities.iter_results),
+                             ("iter_mapped_results", entities.iter_mapped_results)):
+            parse = lambda files: [consume(reader(path)) for path in files]
+            keep = lambda files: [list(reader(path)) for path in files]
+            report(name, rows, timed_run(parse, results, setup=None))
+            print("{:<40} {:>10.1f} KiB peak".format(
+                name, traced_peak(parse, results, setup=None) / 2 ** 10))
+            print("{:<40} {:>10.2f} blocks per row kept".format(
+                name, traced_blocks(keep, results, setup=None) / rows))
+        for name, loader in (
+                ("load_data (lines)", entities.load_data),
+                ("load_data (mmap)", partial(entities.load_data, use_mmap=True))):
+            report(name, rows, timed_run(loader, *paths))
+            print("{:<40} {:>10.1f} MiB peak".format(
+                name, traced_peak(loader, *paths) / 2 ** 20))
+            print("{:<40} {:>10} blocks".format(
+                name, traced_blocks(loader, *paths)))
+        reset()
+
+
+def bench_snapshot(rows):
+    """Compares parsing the data files with restoring a snapshot of them."""
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_dataset(directory, rows)
+        snapshot = os.path.join(directory, "games.snapshot")
+        report("load_data (parse)", rows, timed_run(entities.load_data, *paths))
+        report("load_data (parse, write snapshot)", rows, timed_run(
+            partial(entities.load_data, snapshot=snapshot), *paths, repeat=1))
+        report("load_data (restore snapshot)", rows, timed_run(
+            partial(entities.load_data, snapshot=snapshot), *paths))
+        reset()
+
+
+def bench_collection(entries):
+    """Compares the per item and bulk ManagedDictionary operations."""
+    pairs = [(str(key), key) for key in range(entries)]
+    keys = [key for key, _ in pairs]
+
+    def add_each():
+        collection = entities.ManagedDictionary()
+        for key, item in pairs:
+            collection.add_item(key, item)
+        return collection
+
+    def add_bulk():
+        collection = entities.ManagedDictionary()
+        collection.add_items(pairs)
+        return collection
+
+    collection = add_bulk()
+    for name, operation in (
+            ("add_item per entry", add_each),
+            ("add_items", add_bulk),
+            ("find_item per key", lambda: [collection.find_item(key)
+                                           for key in keys]),
+            ("find_items", lambda: collection.find_items(keys)),
+            ("get_id per key", lambda: [collection.get_id(key)
+                                        for key in keys]),
+            ("find_item_by_id per ID", lambda: [
+                collection.find_item_by_id(item_id)
+                for item_id in range(entries)]),
+            ("len(get_items())", lambda: len(collection.get_items())),
+            ("len()", lambda: len(collection)),
+            ("iterate get_items()", lambda: consume(collection.get_items())),
+            ("iterate view_items()",
+             lambda: consume(collection.view_items()))):
+        report(name, entries, timed_run(operation, setup=None))
+
+
+def bench_numpy(rows):
+    """Compares the row by row and NumPy results file parsers and loads."""
+    if entities.numpy is None:
+        print("NumPy is not installed, skipping the numpy benchmark")
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_dataset(directory, rows)
+        results = paths[3:]
+        parse_rows = lambda files: [consume(entities.iter_results(path))
+                                    for path in files]
+        parse_arrays = lambda files: [entities.read_result_arrays(path)
+                                      for path in files]
+        for name, parse in (("iter_results", parse_rows),
+                            ("read_result_arrays", parse_arrays)):
+            report(name, rows, timed_run(parse, results, setup=None))
+            print("{:<40} {:>10.1f} MiB peak".format(
+                name, traced_peak(parse, results, setup=None) / 2 ** 20))
+        report("load_data (rows)", rows, timed_run(entities.load_data, *paths))
+        report("load_data (numpy)", rows, timed_run(
+            partial(entities.load_data, use_numpy=True), *paths))
+        reset()
+
+
+def bench_sharded(rows):
+    """Compares placing every event and counting medals in one process with
+       ShardedResults across an increasing number of worker processes.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_dataset(directory, rows)
+        report("load_data + DeterminePlaces", rows,
+               timed_run(load_and_count_medals, *paths, repeat=1))
+        workers = 1
+        while workers <= (os.cpu_count() or 1) * 2:
+            sharded = lambda *files: processing.ShardedResults(
+                *files, workers=workers).process()
+            report("ShardedResults ({} workers)".format(workers), rows,
+                   timed_run(sharded, *paths, repeat=1))
+            workers *= 2
+        reset()
+
+
+def bench_lazy(rows):
+    """Compares startup time and resident memory of eager and lazy loading,
+       and the time of a first query touching one event.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_dataset(directory, rows)
+        event_name = "Timed Event 0m"
+        for name, loader in (("load_data (eager)", entities.load_data),
+                             ("load_data (lazy)", partial(entities.load_data,
+                                                          lazy=True))):
+            report(name, rows, timed_run(loader, *paths))
+            print("{:<40} {:>10.1f} MiB resident".format(
+                name, traced_resident(loader, *paths) / 2 ** 20))
+            reset()
+            loader(*paths)
+            place = lambda: processing.DeterminePlaces(
+                all_events.find_item(event_name)).process()
+            report(name + " first query", rows, timed_run(place, repeat=1,
+                                                          setup=None))
+        reset()
+
+
+def bench_memory(objects):
+    """Reports the bytes allocated per athlete, event, country and result for
+       the original and current entity classes, built with their constructors.
+       A result added to an event is also measured as a row of the event's
+       ResultStore, which is how the loaders create them.
+    """
+    country = Country("Canada", "CAN")
+    athlete = Athlete("1", "First", "Surname", country)
+    store = entities.ResultStore()
+    for kind, legacy, current, make in (
+            ("Athlete", LegacyAthlete, Athlete,
+             lambda cls, i: cls(str(i), "First", "Surname", country)),
+            ("Event", LegacyEvent, Event,
+             lambda cls, i: cls("Event", "TIMED", [])),
+            ("Country", LegacyCountry, Country,
+             lambda cls, i: cls("Country", "CAN")),
+            ("Result", LegacyResult, Result, lambda cls, i: cls(i + 0.5))):
+        for name, cls in (("original", legacy), ("current", current)):
+            build = lambda: [make(cls, i) for i in range(objects)]
+            print("{:<40} {:>10.1f} bytes each".format(
+                "{} ({})".format(kind, name),
+                traced_resident(build, setup=gc.collect) / objects))
+    build = lambda: [store.add(athlete, i + 0.5) for i in range(objects)]
+    print("{:<40} {:>10.1f} bytes each".format(
+        "Result (current, in an event)",
+        traced_resident(build, setup=gc.collect) / objects))
+
+
+def bench_intern(rows):
+    """Compares resident memory of load_data with and without interning the
+       athletes' names.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_dataset(directory, rows)
+        for name, intern in (("load_data (not interned)", lambda text: text),
+                             ("load_data (interned)", sys.intern)):
+            entities._intern = intern
+            print("{:<40} {:>10.1f} MiB resident".format(
+                name, traced_resident(entities.load_data, *paths) / 2 ** 20))
+        entities._intern = sys.intern
+        reset()
+
+
+def bench_rank(rows):
+    """Compares the original and current DeterminePlaces on every event."""
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_dataset(directory, rows)
+        reset()
+        entities.load_data(*paths)
+        events = all_events.get_items()
+        for name, place in (
+                ("DeterminePlaces (original)", legacy_determine_places),
+                ("DeterminePlaces", lambda event: processing.DeterminePlaces(
+                    event).process())):
+            place_all = lambda: [place(event) for event in events]
+            report(name, rows, timed_run(place_all, setup=None))
+        reset()
+
+
+def duplicate_results(paths, copies):
+    """Repeats every row of the timed and scored results files 'copies' times,
+       as a data set whose registrations were recorded more than once would.
+    """
+    for path in paths[3:]:
+        with open(path) as results_file:
+            rows = results_file.read()
+        with open(path, "w") as results_file:
+            results_file.write(rows * copies)
+
+
+def bench_dedup(rows):
+    """Times EventResults and DeterminePlaces on every event when each results
+       row appears once, twice, four and eight times in the data files.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        for copies in (1, 2, 4, 8):
+            paths = make_dataset(directory, rows)
+            duplicate_results(paths, copies)
+            reset()
+            entities.load_data(*paths)
+            events = all_events.get_items()
+            for name, command in (("DeterminePlaces", processing.DeterminePlaces),
+                                  ("EventResults", processing.EventResults)):
+                process_all = lambda: [command(event).process()
+                                       for event in events]
+                report("{} (x{} rows)".format(name, copies), rows,
+                       timed_run(process_all, setup=None))
+        reset()
+
+
+def bench_views(rows):
+    """Compares the copying accessors with the read-only views used by the
+       commands in processing.py, both sizing each collection and iterating
+       it, then times the commands.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_dataset(directory, rows)
+        reset()
+        entities.load_data(*paths)
+        events = all_events.get_items()
+        countries = all_countries.get_items()
+        athletes = all_athletes.get_items()
+        for event in events:
+            processing.DeterminePlaces(event).process()
+        for site, entries, copied, viewed in (
+                ("Event athletes", events, Event.get_athletes,
+                 Event.view_athletes),
+                ("all_athletes items", [all_athletes],
+                 entities.ManagedDictionary.get_items,
+                 entities.ManagedDictionary.view_items)):
+            for name, access in (("get", copied), ("view", viewed)):
+                size_all = lambda: [len(access(entry)) for entry in entries]
+                iterate_all = lambda: [consume(access(entry))
+                                       for entry in entries]
+                report("{} ({}, len)".format(site, name), rows,
+                       timed_run(size_all, repeat=5, setup=None))
+                report("{} ({}, iterate)".format(site, name), rows,
+                       timed_run(iterate_all, repeat=5, setup=None))
+        for name, command, entries in (
+                ("AthleteResults", processing.AthleteResults, athletes),
+                ("EventResults", processing.EventResults, events),
+                ("CountryResults", processing.CountryResults, countries)):
+            process_all = lambda: [command(entry).process()
+                                   for entry in entries]
+            report(name, rows, timed_run(process_all, setup=None))
+        reset()
+
+
+def bench_typed(rows):
+    """Compares the string and numeric Result accessors in the commands, on
+       a data set of 20 large events, and DeterminePlaces on float and fixed
+       point results.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_dataset(directory, rows, num_events=20)
+        reset()
+        entities.load_data(*paths)
+        events = all_events.get_items()
+        athletes = all_athletes.get_items()
+        countries = all_countries.get_items()
+        place_all = lambda: [processing.DeterminePlaces(event).process()
+                             for event in events]
+        report("DeterminePlaces (float)", rows, timed_run(place_all, setup=None))
+        for event in events:
+            event.set_fixed_point(1000)
+        report("DeterminePlaces (fixed point)", rows,
+               timed_run(place_all, setup=None))
+        for name, legacy, command, entries in (
+                ("EventResults", legacy_event_results,
+                 processing.EventResults, events),
+                ("AthleteResults", legacy_athlete_results,
+                 processing.AthleteResults, athletes),
+                ("CountryResults", legacy_country_results,
+                 processing.CountryResults, countries)):
+            report(name + " (str)", rows, timed_run(
+                lambda: [legacy(entry) for entry in entries], setup=None))
+            report(name + " (numeric)", rows, timed_run(
+                lambda: [command(entry).process() for entry in entries],
+                setup=None))
+        reset()
+
+
+def bench_gc(rows):
+    """Compares load_data with the garbage collector running and in bulk
+       mode, reporting the collections run during each load and the time of
+       a full collection afterwards.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_dataset(directory, rows)
+        for name, bulk in (("load_data", False), ("load_data (bulk)", True)):
+            reset()
+            entities.load_data(*paths, bulk=bulk)
+            stats = entities.get_load_stats()
+            report(name, rows, stats["elapsed"])
+            print("{:<40} {:>10.3f} s in {} collections {}".format(
+                name + " gc pause", stats["gc_pause"],
+                sum(stats["collections"]), stats["collections"]))
+            start = time.perf_counter()
+            gc.collect()
+            print("{:<40} {:>10.3f} s".format(
+                name + " then gc.collect()", time.perf_counter() - start))
+        reset()
+
+
+def bench_index(rows):
+    """Compares finding timed events, athletes by country and athletes by
+       surname by scanning get_items() and through the standard indexes, and
+       times load_data with and without the indexes declared.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_dataset(directory, rows)
+        report("load_data", rows, timed_run(entities.load_data, *paths))
+        entities.add_standard_indexes()
+        report("load_data (indexed)", rows,
+               timed_run(entities.load_data, *paths))
+        codes = [country.get_country_code()
+                 for country in all_countries.get_items()][:20]
+        surnames = sorted({athlete.surname.lower()
+                           for athlete in all_athletes.get_items()})[:20]
+        for name, scan, indexed in (
+                ("timed events",
+                 lambda: [event for event in all_events.get_items()
+                          if event.is_timed()],
+                 lambda: all_events.find_by_index("timed", True)),
+                ("athletes of 20 countries",
+                 lambda: [[athlete for athlete in all_athletes.get_items()
+                           if athlete.get_country().get_country_code() == code]
+                          for code in codes],
+                 lambda: [all_athletes.find_by_index("country", code)
+                          for code in codes]),
+                ("athletes with 20 surnames",
+                 lambda: [[athlete for athlete in all_athletes.get_items()
+                           if athlete.surname.lower() == surname]
+                          for surname in surnames],
+                 lambda: [all_athletes.find_by_index("surname", surname)
+                          for surname in surnames])):
+            report(name + " (scan)", rows, timed_run(scan, setup=None))
+            report(name + " (index)", rows, timed_run(indexed, setup=None))
+        reset()
+
+
+def bench_datasets(rows):
+    """Compares answering alternate queries on two Games by reloading the
+       global collections at each switch and by keeping two Datasets loaded.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        games = []
+        for seed in (1, 2):
+            games_directory = os.path.join(directory, str(seed))
+            os.mkdir(games_directory)
+            games.append(make_dataset(games_directory, rows, seed=seed))
+        switches = 10
+
+        def reload_each_switch():
+            for i in range(switches):
+                reset()
+                entities.load_data(*games[i % 2])
+                len(all_events.find_item("Timed Event 0m").get_athletes())
+
+        def keep_datasets():
+            datasets = [entities.Dataset(), entities.Dataset()]
+            for dataset, paths in zip(datasets, games):
+                dataset.load_data(*paths)
+            for i in range(switches):
+                len(datasets[i % 2].events.find_item("Timed Event 0m").get_athletes())
+
+        report("10 switches (reload globals)", rows,
+               timed_run(reload_each_switch, repeat=1))
+        report("10 switches (two Datasets)", rows,
+               timed_run(keep_datasets, repeat=1))
+        reset()
+
+
+def make_event(entrants, timed=True, seed=1001):
+    """Returns an event with 'entrants' athletes and a result for each, with
+       two decimal places so that some results are tied.
+    """
+    rand = random.Random(seed)
+    country = Country("Country", "C00")
+    event = Event("Event", "TIMED" if timed else "SCORED", [])
+    store = event.get_result_store()
+    for identifier in range(entrants):
+        athlete = Athlete(str(identifier), "First{}".format(identifier % 997),
+                          "Surname{}".format(identifier % 4999), country)
+        event.add_athlete(athlete)
+        athlete.add_event(event)
+        athlete.add_result(event, store.add(athlete, round(
+            rand.uniform(30, 400), 2)))
+    return event
+
+
+def composite_determine_places(event):
+    """Places an event with one sort on (result, name) tuples, kept to compare
+       with the two stable sorts used by DeterminePlaces.
+    """
+    store = event.get_result_store()
+    athletes = store.athletes
+    values = store.values
+    sign = 1 if event.is_timed() else -1
+    rows = sorted(range(len(store)), key=lambda row: (
+        sign * values[row], athletes[row].get_full_name()))
+    place = 0
+    previous_value = None
+    for position, row in enumerate(rows, 1):
+        if values[row] != previous_value:
+            place = position
+            previous_value = values[row]
+        store.places[row] = place
+    return [athletes[row] for row in rows]
+
+
+def bench_ranking(max_entrants):
+    """Compares the original DeterminePlaces, a single composite key sort and
+       the current DeterminePlaces on one event of 10^3 entrants up to
+       'max_entrants', checking that all three give the same places.
+    """
+    entrants = 1000
+    while entrants <= max_entrants:
+        event = make_event(entrants)
+        store = event.get_result_store()
+        places = None
+        for name, place in (
+                ("original", legacy_determine_places),
+                ("composite key sort", composite_determine_places),
+                ("current", lambda event: processing.DeterminePlaces(
+                    event).process())):
+            report("DeterminePlaces ({})".format(name), entrants,
+                   timed_run(place, event, setup=None))
+            if places is not None and list(store.places) != places:
+                print("{:<40} places differ".format(name))
+            places = list(store.places)
+        entrants *= 10
+        del event, store
+        gc.collect()
+
+
+def bench_batch(rows):
+    """Compares a DeterminePlaces per event with DetermineAllPlaces, in this
+       process and across an increasing number of worker processes.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_dataset(directory, rows)
+        reset()
+        entities.load_data(*paths)
+        events = all_events.get_items()
+        place_each = lambda: [processing.DeterminePlaces(event).process()
+                              for event in events]
+        report("DeterminePlaces per event", rows,
+               timed_run(place_each, setup=None))
+        report("DetermineAllPlaces", rows, timed_run(
+            lambda: processing.DetermineAllPlaces().process(), setup=None))
+        workers = 1
+        while workers <= (os.cpu_count() or 1) * 2:
+            batch = processing.DetermineAllPlaces(workers=workers)
+            report("DetermineAllPlaces ({} workers)".format(workers), rows,
+                   timed_run(batch.process, setup=None))
+            workers *= 2
+        reset()
+
+
+def bench_incremental(max_entrants):
+    """Compares re-placing one event of 10^3 entrants up to 'max_entrants'
+       with DeterminePlaces after each of 100 corrected results, with
+       updating its Standings, checking that both give the same places.
+    """
+    entrants = 1000
+    while entrants <= max_entrants:
+        rand = random.Random(entrants)
+        corrections = [(rand.randrange(entrants), round(rand.uniform(30, 400), 2))
+                       for correction in range(100)]
+        places = None
+        for name in ("DeterminePlaces", "Standings"):
+            event = make_event(entrants)
+            store = event.get_result_store()
+            athletes = list(store.athletes)
+            if name == "Standings":
+                standings = processing.Standings(event)
+                correct = lambda athlete, value: standings.add_result(
+                    athlete, value)
+            else:
+                processing.DeterminePlaces(event).process()
+                def correct(athlete, value):
+                    athlete.add_result(event, store.add(
+                        athlete, value, athlete.get_result(event)))
+                    processing.DeterminePlaces(event).process()
+            start = time.perf_counter()
+            for index, value in corrections:
+                correct(athletes[index], value)
+            report("{} (100 corrections)".format(name), entrants,
+                   time.perf_counter() - start)
+            if places is not None and list(store.places) != places:
+                print("{:<40} places differ".format(name))
+            places = list(store.places)
+        entrants *= 10
+        del event, store, athletes
+        gc.collect()
+
+
+def country_results_table():
+    """Builds the medal table with a CountryResults per country."""
+    table = []
+    for country in all_countries.get_items():
+        country_results = processing.CountryResults(country)
+        country_results.process()
+        table.append((country, country_results.get_results()))
+    table.sort(key=lambda item: item[0].get_name())
+    table.sort(key=lambda item: item[1][:3], reverse=True)
+    return table
+
+
+def bench_medals(rows):
+    """Compares building the medal table of every country with the original
+       and current CountryResults per country, and with MedalTable.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_dataset(directory, rows)
+        reset()
+        entities.load_data(*paths)
+        processing.DetermineAllPlaces().process()
+        countries = all_countries.get_items()
+        report("CountryResults (original) per country", rows, timed_run(
+            lambda: [legacy_country_results(country) for country in countries],
+            setup=None))
+        report("CountryResults per country", rows,
+               timed_run(country_results_table, setup=None))
+        medal_table = processing.MedalTable()
+        report("MedalTable", rows, timed_run(medal_table.process, setup=None))
+        if medal_table.get_results() != country_results_table():
+            print("{:<40} tables differ".format("MedalTable"))
+        reset()
+
+
+def clear_places():
+    """Sets every place in every event back to undetermined."""
+    for event in all_events.get_items():
+        store = event.get_result_store()
+        store.set_places(range(len(store)), [0] * len(store))
+
+
+def bench_live(rows):
+    """Compares polling the medal table with CountryResults per country, with
+       MedalTable and with LiveMedalTable, and the cost to DeterminePlaces of
+       the LiveMedalTable observing every place it sets.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_dataset(directory, rows)
+        reset()
+        entities.load_data(*paths)
+        place_all = lambda: processing.DetermineAllPlaces().process()
+        report("DetermineAllPlaces", rows,
+               timed_run(place_all, setup=clear_places))
+        medal_table = processing.MedalTable()
+        report("CountryResults per country poll", rows,
+               timed_run(country_results_table, setup=None))
+        report("MedalTable poll", rows,
+               timed_run(medal_table.process, setup=None))
+        live_table = processing.LiveMedalTable()
+        live_table.process()
+        report("LiveMedalTable poll", rows,
+               timed_run(live_table.get_results, setup=None))
+        report("DetermineAllPlaces (observed)", rows,
+               timed_run(place_all, setup=clear_places))
+        medal_table.process()
+        if live_table.get_results() != medal_table.get_results():
+            print("{:<40} tables differ".format("LiveMedalTable"))
+        live_table.close()
+        reset()
+
+
+def load_and_count_medals(*paths):
+    """Loads every entity, places every event and counts each country's medals."""
+    entities.load_data(*paths)
+    for event in all_events.get_items():
+        processing.DeterminePlaces(event).process()
+    for country in all_countries.get_items():
+        processing.CountryResults(country).process()
+
+
+def stream_and_count_medals(*paths):
+    """Counts each country's medals directly from the data files."""
+    processing.StreamCountryResults(*paths).process()
+
+
+def bench_stream(rows):
+    """Compares time and peak memory of counting medals by loading every
+       entity against streaming the results files.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_dataset(directory, rows)
+        for name, counter in (("medals (load_data)", load_and_count_medals),
+                              ("medals (streamed)", stream_and_count_medals)):
+            report(name, rows, timed_run(counter, *paths, repeat=1))
+            print("{:<40} {:>10.1f} MiB peak".format(
+                name, traced_peak(counter, *paths) / 2 ** 20))
+        reset()
+
+
+BENCHMARKS = {
+    "load": bench_load,
+    "stream": bench_stream,
+    "mmap": bench_mmap,
+    "snapshot": bench_snapshot,
+    "collection": bench_collection,
+    "numpy": bench_numpy,
+    "sharded": bench_sharded,
+    "lazy": bench_lazy,
+    "memory": bench_memory,
+    "intern": bench_intern,
+    "rank": bench_rank,
+    "ranking": bench_ranking,
+    "dedup": bench_dedup,
+    "views": bench_views,
+    "typed": bench_typed,
+    "gc": bench_gc,
+    "index": bench_index,
+    "datasets": bench_datasets,
+    "batch": bench_batch,
+    "incremental": bench_incremental,
+    "medals": bench_medals,
+    "live": bench_live,
+}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print("Usage: python benchmarks.py {} [rows]".format(
+            "|".join(sorted(BENCHMARKS))))
+        sys.exit(1)
+    BENCHMARKS[sys.argv[1]](int(sys.argv[2]) if len(sys.argv) > 2 else 10 ** 6)
@@ -5,16 +5,39 @@
     Event: Details of an individual event at the games.
     Country: Details of a country and its delegation at the games.
     Result: An athlete's result in an event.
+    ResultsFeed: Loads results as they are appended to the results files.
+    ReadOnlyView: An immutable view of a collection's items, without a copy.
+    Dataset: The athletes, countries and events of one Games.
 """
 
 __author__ = "Caleb Aitken, 45309414"
 __email__ = "caleb@jasa.id.au"
 
+import gc
+import hashlib
+import json
+import mmap
+import os
+import sys
+import threading
+import time
+from array import array
+from contextlib import contextmanager, nullcontext
+from itertools import islice
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 # done
 class Athlete(object):
     """Details of an athlete who is competing at the games."""
 
+    __slots__ = ("identifier", "first_name", "surname", "country", "results",
+                 "events", "__weakref__")
+
     def __init__(self, identifier, first_name, surname, country):
         """
         Parameters:
@@ -28,6 +51,9 @@ class Athlete(object):
         self.surname = str(surname)
         self.country = country
         self.results = {}
+        # An athlete competes in few events, so the list is searched rather
+        # than kept with a set, which would take more memory than the rest
+        # of the athlete.
         self.events = []
 
     def get_result(self, event):
@@ -47,24 +73,71 @@ class Athlete(object):
         Parameters:
             event (Event): Event in which this athlete competed.
             result (Result): Final result obtained in event.
+
+        Raises:
+            ValueError: If 'result' is already another athlete's result or
+                        a result in another event, as one result cannot be
+                        held in two places.
         """
+        store = event.result_store
+        if result._store is None:
+            store.adopt(self, result, self.results.get(event))
+        elif result._store is not store or store.athletes[result._row] is not self:
+            raise ValueError("result is already another athlete's result or "
+                             "a result in another event")
         self.results[event] = result
 
+    def remove_result(self, event):
+        """Removes the athlete's result in 'event'. The athlete no longer
+           competes in the event, so the event is removed from the athlete's
+           events and the athlete from the event's athletes.
+
+        Parameters:
+            event (Event): Event from which the athlete's result is removed.
+
+        Raises:
+            KeyError: If the athlete has no result in 'event'.
+        """
+        result = self.results.pop(event)
+        store = event.get_result_store()
+        if result._store is store:
+            store.remove(result)
+        self.remove_event(event)
+        event.remove_athlete(self)
+
     def add_event(self, event):
         """Adds event to those in which this athlete will compete.
+           Does nothing if the event has already been added.
 
         Parameters:
             event (Event): Event in which this athlete will compete.
         """
-        self.events.append(event)
+        if event not in self.events:
+            self.events.append(event)
+
+    def remove_event(self, event):
+        """Removes event from those in which this athlete will compete.
+           Does nothing if the event was not added.
+
+        Parameters:
+            event (Event): Event in which this athlete no longer competes.
+        """
+        if event in self.events:
+            self.events.remove(event)
 
     def add_events(self, events):
         """Adds all events to those in which this athlete will compete.
+           Events which have already been added are skipped.
 
         Parameters:
             events (list[Event]): List of events in which this athlete will compete.
         """
-        self.events.extend(events)
+        for event in events:
+            self.add_event(event)
+
+    def has_event(self, event):
+        """(bool) True if this athlete is competing in 'event'."""
+        return event in self.events
 
     def get_events(self):
         """(list[Event]) All events in which this athlete is competing."""
@@ -91,15 +164,53 @@ class Athlete(object):
 
 # done
 class Result(object):
-    """An athlete's result in an event."""
+    """An athlete's result in an event.
+
+    Results added to an athlete are moved into the event's ResultStore, so
+    that all of an event's results are held together, and their time or score
+    and place are stored in its columns. A result which is in no store holds
+    them itself.
+    """
+
+    __slots__ = ("_store", "_row", "_value", "_place", "__weakref__")
 
     def __init__(self, result_value):
         """
         Parameters:
             result_value (float): Time or score athlete achieved in event.
         """
-        self.result_value = float(result_value)
-        self.place = 0
+        self._store = None  # ResultStore holding this result in row _row
+        self._value = float(result_value)  # held while _store is None
+        self._place = 0  # held while _store is None
+
+    @property
+    def result_value(self):
+        """(float) Time or score athlete achieved in event."""
+        store = self._store
+        if store is None:
+            return self._value
+        if store.scale is None:
+            return store.values[self._row]
+        return store.values[self._row] / store.scale
+
+    @result_value.setter
+    def result_value(self, result_value):
+        if self._store is None:
+            self._value = float(result_value)
+        else:
+            self._store.values[self._row] = self._store.encode(
+                float(result_value))
+
+    @property
+    def place(self):
+        """(int) Place athlete obtained in the event, 0 if not determined."""
+        if self._store is None:
+            return self._place
+        return self._store.places[self._row]
+
+    @place.setter
+    def place(self, place):
+        self.set_place(place)
 
     def get_place(self):
         """(str) Place athlete obtained in the final event.
@@ -112,13 +223,28 @@ class Result(object):
         else:
             return str(self.place)
 
+    def get_place_number(self):
+        """(int) Place athlete obtained in the final event, without converting
+           it to a string.
+
+        Raise:
+            RuntimeError: if places not yet determined.
+        """
+        place = self.place
+        if place == 0:
+            raise RuntimeError("Places not yet determined")
+        return place
+
     def set_place(self, place):
         """Sets the place that the athlete achieved in the final event.
 
         Parameters:
             place (int): Place that athlete achieved in the event.
         """
-        self.place = int(place)
+        if self._store is None:
+            self._place = int(place)
+        else:
+            self._store.set_place(self._row, int(place))
 
     def places_determined(self):
         """(bool) Has places been determined yet or not."""
@@ -131,21 +257,35 @@ class Result(object):
         """(str) Time or score athlete achieved in the final event."""
         return str(self.result_value)
 
+    def get_value(self):
+        """(float) Time or score athlete achieved in the final event, without
+           converting it to a string.
+        """
+        return self.result_value
+
     def get_medal(self):
         """(str) Medal athlete achieved or empty string if no medal.
 
         Raise:
             RuntimeError: if places not yet determined.
         """
-        if self.get_place() == '1':
+        place = self.get_place_number()
+        if place == 1:
             return "Gold"
-        elif self.get_place() == '2':
+        elif place == 2:
             return "Silver"
-        elif self.get_place() == '3':
+        elif place == 3:
             return "Bronze"
         else:
             return ""
 
+    def _detach(self):
+        """Moves this result's value and place out of its store, into itself.
+        """
+        self._value = self.result_value
+        self._place = self._store.places[self._row]
+        self._store = None
+
     def __str__(self):
         return str(self.get_result())
 
@@ -153,10 +293,323 @@ class Result(object):
         return str(self)
 
 
+_new_result = object.__new__
+
+_place_observers = []  # called with each batch of changed places
+_places_watched = 0  # observers added or being added; 0 skips _places_lock
+_pending_places = threading.local()  # changes held by batch_place_changes
+_places_lock = threading.RLock()  # held while observed places change
+
+
+def add_place_observer(observer, start=None):
+    """Calls 'observer' whenever the places of athletes' results change.
+
+    Parameters:
+        observer (callable): Called as observer(changes), where 'changes' is
+                             a list of (store, athlete, old_place, new_place)
+                             tuples. A place of 0 is undetermined or removed.
+        start (callable): Called just before 'observer' is added, while no
+                          place can change, e.g. to count the places which
+                          'observer' then follows.
+    """
+    global _places_watched
+    with _places_lock:
+        # Count the observer first, so that places set from now on take the
+        # lock and wait for 'start' to finish.
+        _places_watched += 1
+        try:
+            if start is not None:
+                start()
+        except BaseException:
+            _places_watched -= 1
+            raise
+        _place_observers.append(observer)
+
+
+def remove_place_observer(observer):
+    """Stops calling 'observer' when places change.
+
+    Raises:
+        ValueError: If 'observer' has not been added.
+    """
+    global _places_watched
+    with _places_lock:
+        _place_observers.remove(observer)
+        _places_watched -= 1
+
+
+@contextmanager
+def batch_place_changes():
+    """Holds back the place changes made by this thread in the 'with' block
+       and passes them to the observers as one batch at its end, so that no
+       observer sees them partly applied. While places are observed, they
+       cannot change in other threads during the block.
+    """
+    if getattr(_pending_places, "changes", None) is not None:
+        yield
+        return
+    observers = ()
+    try:
+        with _places_lock:
+            _pending_places.changes = []
+            try:
+                yield
+            finally:
+                changes = _pending_places.changes
+                _pending_places.changes = None
+                if changes:
+                    observers = list(_place_observers)
+    finally:
+        _call_observers(observers, changes)
+
+
+def _observers_of(changes):
+    """Return the place observers to be called with the (store, athlete,
+       old_place, new_place) 'changes', or no observers if the changes are
+       held back until the end of this thread's batch. Must be called
+       holding _places_lock, and the observers called after releasing it.
+    """
+    pending = getattr(_pending_places, "changes", None)
+    if pending is not None:
+        pending.extend(changes)
+        return ()
+    return list(_place_observers)
+
+
+def _call_observers(observers, changes):
+    """Calls each of 'observers' with 'changes'. Observers are called without
+       holding _places_lock, so batches from different threads may reach an
+       observer in either order.
+    """
+    for observer in observers:
+        observer(changes)
+
+
+class ResultStore(object):
+    """Columnar storage of the results in one event.
+
+    Row i holds the i-th athlete's time or score and place in parallel
+    columns, so an event can be ranked by scanning its columns without
+    visiting each athlete.
+
+    Values are floats unless the store has a fixed point scale, in which case
+    each value is held as the integer round(value * scale), e.g. a scale of
+    1000 holds times in milliseconds, so that equal results compare exactly.
+    """
+
+    __slots__ = ("athletes", "values", "places", "scale")
+
+    def __init__(self):
+        self.athletes = []
+        self.values = array('d')
+        self.places = array('i')
+        self.scale = None  # fixed point scale of values, None for floats
+
+    def encode(self, value):
+        """Return 'value' as it is held in the values column.
+
+        Parameters:
+            value (float): Time or score.
+        """
+        if self.scale is None:
+            return value
+        return round(value * self.scale)
+
+    def set_scale(self, scale):
+        """Converts the values column to fixed point with 'scale' units per
+           point, or back to floats if 'scale' is None.
+
+        Parameters:
+            scale (int): Units per second or point, e.g. 1000 for milliseconds.
+
+        Raises:
+            ValueError: If 'scale' is not a positive integer or None.
+        """
+        _check_scale(scale)
+        values = self.values
+        if self.scale is not None:
+            values = [value / self.scale for value in values]
+        self.scale = scale
+        if scale is None:
+            self.values = array('d', values)
+        else:
+            self.values = array('q', [round(value * scale) for value in values])
+
+    def append(self, athlete, value, place=0):
+        """Adds a row to this store.
+
+        Parameters:
+            athlete (Athlete): Athlete who achieved the result.
+            value (float): Time or score achieved.
+            place (int): Place obtained, 0 if not yet determined.
+
+        Return:
+            int: The new row.
+        """
+        if self.scale is not None:
+            value = round(value * self.scale)
+        if place and athlete is not None and _places_watched:
+            changes = [(self, athlete, 0, place)]
+            with _places_lock:
+                self.athletes.append(athlete)
+                self.values.append(value)
+                self.places.append(place)
+                observers = _observers_of(changes)
+            _call_observers(observers, changes)
+        else:
+            self.athletes.append(athlete)
+            self.values.append(value)
+            self.places.append(place)
+        return len(self.values) - 1
+
+    def set_place(self, row, place):
+        """Sets the place in 'row', notifying the place observers if it
+           changes.
+
+        Parameters:
+            row (int): Row whose place is set.
+            place (int): Place obtained, 0 if not yet determined.
+        """
+        if not _places_watched:
+            # Nothing is called between the test and the store, so no
+            # observer can be added in between.
+            self.places[row] = place
+            return
+        with _places_lock:
+            previous = self.places[row]
+            self.places[row] = place
+            athlete = self.athletes[row]
+            if previous == place or athlete is None:
+                return
+            changes = [(self, athlete, previous, place)]
+            observers = _observers_of(changes)
+        _call_observers(observers, changes)
+
+    def set_places(self, rows, places):
+        """Sets the place of each row in 'rows', notifying the place observers
+           of those which change as one batch.
+
+        Parameters:
+            rows (iterable[int]): Rows whose places are set.
+            places (iterable[int]): Place obtained in each of 'rows'.
+        """
+        set_place = self.places.__setitem__
+        # Unlike set_place, this takes the lock even when places are not
+        # observed, as an observer added part way through the rows would
+        # count some of the new places but not be told of the rest.
+        with _places_lock:
+            if not _places_watched:
+                for row, place in zip(rows, places):
+                    set_place(row, place)
+                return
+            changes = []
+            for row, place in zip(rows, places):
+                previous = self.places[row]
+                set_place(row, place)
+                athlete = self.athletes[row]
+                if previous != place and athlete is not None:
+                    changes.append((self, athlete, previous, place))
+            observers = _observers_of(changes) if changes else ()
+        _call_observers(observers, changes)
+
+    def add(self, athlete, value, previous=None):
+        """Adds the athlete's result to this store.
+
+        Parameters:
+            athlete (Athlete): Athlete who achieved the result.
+            value (float): Time or score achieved.
+            previous (Result): Athlete's previous result in this event, whose
+                               row is reused if it is in this store.
+
+        Return:
+            Result: The athlete's new result.
+        """
+        if self.scale is not None:
+            value = round(value * self.scale)
+        if previous is not None and previous._store is self:
+            row = previous._row
+            previous._detach()
+            self.values[row] = value
+            self.set_place(row, 0)
+        else:
+            row = len(self.values)
+            self.athletes.append(athlete)
+            self.values.append(value)
+            self.places.append(0)
+        result = _new_result(Result)
+        result._store = self
+        result._row = row
+        return result
+
+    def adopt(self, athlete, result, previous=None):
+        """Moves 'result', which is in no store, into this store as the
+           athlete's result.
+
+        Parameters:
+            athlete (Athlete): Athlete who achieved the result.
+            result (Result): Result to be moved into this store.
+            previous (Result): Athlete's previous result in this event, whose
+                               row is reused if it is in this store.
+        """
+        value = result.result_value
+        place = result.place
+        if previous is not None and previous._store is self:
+            row = previous._row
+            if previous is not result:
+                previous._detach()
+            with batch_place_changes():
+                self.set_place(row, 0)
+                self.athletes[row] = athlete
+                self.values[row] = self.encode(value)
+                self.set_place(row, place)
+        else:
+            row = self.append(athlete, value, place)
+        result._store = self
+        result._row = row
+
+    def remove(self, result):
+        """Moves 'result' out of this store into a store of its own. The last
+           row is moved into the freed row, so that the rows stay dense.
+
+        Parameters:
+            result (Result): Result in this store to be removed.
+        """
+        row = result._row
+        result._detach()
+        with batch_place_changes():
+            self.set_place(row, 0)
+            last = len(self.values) - 1
+            if row != last:
+                moved = self.athletes[last]
+                for other in moved.results.values():
+                    if other._store is self and other._row == last:
+                        other._row = row
+                        break
+                self.athletes[row] = moved
+                self.values[row] = self.values[last]
+                self.places[row] = self.places[last]
+            self.athletes.pop()
+            self.values.pop()
+            self.places.pop()
+
+    def __len__(self):
+        """(int) Number of rows in this store."""
+        return len(self.values)
+
+
+def _check_scale(scale):
+    """Raises ValueError unless 'scale' is a positive integer or None."""
+    if scale is not None and (type(scale) is not int or scale <= 0):
+        raise ValueError("scale must be a positive integer or None")
+
+
 # done
 class Event(object):
     """An event in which athletes compete."""
 
+    __slots__ = ("event_name", "timed", "athletes", "result_store",
+                 "_athlete_set", "_lazy", "__weakref__")
+
     def __init__(self, event_name, timed, athletes):
         """
         Parameters:
@@ -169,12 +622,27 @@ class Event(object):
             self.timed = True
         elif timed == "SCORED" or timed == False:
             self.timed = False
-        self.athletes = athletes
+        self.athletes = []
+        self._athlete_set = set()  # the same athletes as self.athletes
+        self._lazy = False  # athletes may hold unbuilt _LazyAthlete entries
+        self.result_store = ResultStore()  # results of athletes in this event
+        self.add_athletes(athletes)
 
     def is_timed(self):
         """(bool) True if event is timed, False if event is scored."""
         return self.timed
 
+    def set_fixed_point(self, scale):
+        """Holds the results of this event as fixed point integers, so that
+           equal times or scores tie exactly when places are determined.
+
+        Parameters:
+            scale (int): Units per second or point, e.g. 1000 for milliseconds
+                         or 100 for hundredths of a point. None returns to
+                         floats.
+        """
+        self.result_store.set_scale(scale)
+
     def get_name(self):
         """(str) Official name of this event."""
         return self.event_name
@@ -183,24 +651,74 @@ class Event(object):
         """(list[Athlete]) All athletes currently registered to compete
                            in this event.
         """
+        if self._lazy:
+            self._lazy = _build_all(self.athletes, self._athlete_set)
         return list(self.athletes)
 
+    def view_athletes(self):
+        """(ReadOnlyView) All athletes who compete in this event, without
+           copying them.
+        """
+        if self._lazy:
+            self._lazy = _build_all(self.athletes, self._athlete_set)
+        return ReadOnlyView(self.athletes)
+
+    def get_result_store(self):
+        """(ResultStore) The results of the athletes in this event, in columns.
+        """
+        if self._lazy:
+            self._lazy = _build_all(self.athletes, self._athlete_set)
+        return self.result_store
+
     def add_athlete(self, athlete):
         """Adds athlete to those who will compete in this event.
+           Does nothing if the athlete has already been added.
 
         Parameters:
             athlete (Athlete): An athlete who will compete in this event.
         """
-        self.athletes.append(athlete)
+        if self._lazy:
+            self._lazy = _build_all(self.athletes, self._athlete_set)
+        if athlete not in self._athlete_set:
+            self._athlete_set.add(athlete)
+            self.athletes.append(athlete)
+
+    def remove_athlete(self, athlete):
+        """Removes athlete from those who will compete in this event.
+           Does nothing if the athlete was not added.
+
+        Parameters:
+            athlete (Athlete): An athlete who no longer competes in this event.
+        """
+        if self._lazy:
+            self._lazy = _build_all(self.athletes, self._athlete_set)
+        if athlete in self._athlete_set:
+            self._athlete_set.remove(athlete)
+            self.athletes.remove(athlete)
 
     def add_athletes(self, athletes):
         """Adds all athletes to those who will compete in this event.
+           Athletes who have already been added are skipped.
 
         Parameters:
             athletes (list[Athlete]): List of athletes who will compete
                                       in this event.
         """
-        self.athletes.extend(athletes)
+        for athlete in athletes:
+            self.add_athlete(athlete)
+
+    def has_athlete(self, athlete):
+        """(bool) True if 'athlete' is registered to compete in this event."""
+        if self._lazy:
+            self._lazy = _build_all(self.athletes, self._athlete_set)
+        return athlete in self._athlete_set
+
+    def _add_unbuilt(self, athlete):
+        """Adds an unbuilt _LazyAthlete without building the other athletes."""
+        if athlete not in self._athlete_set:
+            self._athlete_set.add(athlete)
+            self.athletes.append(athlete)
+        self._lazy = True
 
     def __str__(self):
         return str(self.get_name())
@@ -213,6 +731,9 @@ class Event(object):
 class Country(object):
     """Representation of a country's delegation."""
 
+    __slots__ = ("country_name", "country_code", "athletes", "_athlete_set",
+                 "_lazy", "__weakref__")
+
     def __init__(self, country_name, country_code):
         """
         Parameters:
@@ -222,27 +743,51 @@ class Country(object):
         self.country_name = str(country_name)
         self.country_code = str(country_code)
         self.athletes = []
+        self._athlete_set = set()  # the same athletes as self.athletes
+        self._lazy = False  # athletes may hold unbuilt _LazyAthlete entries
 
     def get_athletes(self):
         """(list[Athlete]) All athletes competing for this country."""
+        if self._lazy:
+            self._lazy = _build_all(self.athletes, self._athlete_set)
         return self.athletes
 
     def add_athlete(self, athlete):
         """Adds athlete as a member of this country's delegation.
+           Does nothing if the athlete has already been added.
 
         Parameters:
             athlete (Athlete): An athlete who will compete for this country.
         """
-        self.athletes.append(athlete)
+        if self._lazy:
+            self._lazy = _build_all(self.athletes, self._athlete_set)
+        if athlete not in self._athlete_set:
+            self._athlete_set.add(athlete)
+            self.athletes.append(athlete)
 
     def add_athletes(self, athletes):
         """Adds all athletes as members of this country's delegation.
+           Athletes who have already been added are skipped.
 
         Parameters:
             athletes (list[Athlete]): List of athletes who will compete
                                       for this country.
         """
-        self.athletes.extend(athletes)
+        for athlete in athletes:
+            self.add_athlete(athlete)
+
+    def has_athlete(self, athlete):
+        """(bool) True if 'athlete' competes for this country."""
+        if self._lazy:
+            self._lazy = _build_all(self.athletes, self._athlete_set)
+        return athlete in self._athlete_set
+
+    def _add_unbuilt(self, athlete):
+        """Adds an unbuilt _LazyAthlete without building the other athletes."""
+        if athlete not in self._athlete_set:
+            self._athlete_set.add(athlete)
+            self.athletes.append(athlete)
+        self._lazy = True
 
     def get_name(self):
         """(str) Country's official name."""
@@ -260,11 +805,77 @@ class Country(object):
 
 
 # done
+class ReadOnlyView(object):
+    """An immutable, indexable view of a list owned by an entity or collection.
+
+    The list is not copied, so a view of an entity's list sees athletes or
+    events added to the entity after the view was taken.
+    """
+
+    __slots__ = ("_items",)
+
+    def __init__(self, items):
+        """
+        Parameters:
+            items (list): The list to be viewed.
+        """
+        self._items = items
+
+    def __len__(self):
+        """(int) Number of items in the view."""
+        return len(self._items)
+
+    def __getitem__(self, index):
+        """Return the item at 'index', or a list of the items in a slice."""
+        return self._items[index]
+
+    def __iter__(self):
+        """Iterates over the items in the view."""
+        return iter(self._items)
+
+    def __reversed__(self):
+        """Iterates over the items in the view, last item first."""
+        return reversed(self._items)
+
+    def __contains__(self, item):
+        """(bool) True if 'item' is in the view."""
+        return item in self._items
+
+    def __eq__(self, other):
+        """(bool) True if 'other' is a view or list of equal items."""
+        if isinstance(other, ReadOnlyView):
+            other = other._items
+        return self._items == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "ReadOnlyView({!r})".format(self._items)
+
+
 class ManagedDictionary(object):
-    """A generic collection as a managed dictionary."""
+    """A generic collection as a managed dictionary.
+
+    Each key is also given a dense integer ID, in the order keys are first
+    added, so that an item can be referred to by its position as well as by
+    its key. IDs follow the order of get_items and are kept when an item is
+    overwritten.
+
+    Secondary indexes, declared with add_index, group the items by a value
+    computed from each item and are kept up to date as items are added.
+
+    Items may be added unbuilt, as a _Lazy placeholder, in which case the
+    item is built the first time it is found or listed.
+    """
 
     def __init__(self):
         self._items = {}
+        self._ids = {}  # key -> ID, for the first len(self._keys) keys
+        self._keys = []  # ID -> key, extended from _items when needed
+        self._indexes = {}  # index name -> _Index
+        self._stale_indexes = False  # indexes must be rebuilt before use
+        self._lazy = False  # _items may hold unbuilt _Lazy placeholders
+        self._values = None  # list of the items shared by views, if current
 
     def add_item(self, key, item):
         """Adds an item to this collection.
@@ -274,12 +885,112 @@ class ManagedDictionary(object):
             key (immutable): Unique key for the item.
             item (value): The item to be added to this collection.
         """
+        if self._indexes and not self._stale_indexes:
+            for index in self._indexes.values():
+                index.add(key, item)
         self._items[key] = item
+        self._values = None
+
+    def add_items(self, pairs):
+        """Adds many items to this collection at once.
+           Overwriting previous items if keys were mapped to items already.
+
+        Parameters:
+            pairs (iterable[tuple]): (key, item) pairs to be added.
+        """
+        if self._indexes:
+            for key, item in pairs:
+                self.add_item(key, item)
+        else:
+            self._items.update(pairs)
+            self._values = None
+
+    def add_lazy_item(self, key, placeholder):
+        """Adds an item which is built from 'placeholder' when first accessed.
+
+        Parameters:
+            key (immutable): Unique key for the item.
+            placeholder (_Lazy): Builds and caches the item.
+        """
+        self._items[key] = placeholder
+        self._lazy = True
+        self._values = None
+        if self._indexes:
+            self._stale_indexes = True
+
+    def add_index(self, name, function):
+        """Declares a secondary index of the items in this collection, which
+           groups them by function(item) and is kept up to date as items are
+           added. function(item) should only depend on attributes which do not
+           change after the item is added.
+
+        Parameters:
+            name (str): Name of the index, replacing any index of that name.
+            function (callable): Takes an item and returns a hashable value
+                                 by which it is found with find_by_index.
+        """
+        index = self._indexes[name] = _Index(function)
+        if self._lazy:
+            self._stale_indexes = True
+        else:
+            index.rebuild(self._items)
+
+    def find_by_index(self, name, value):
+        """Return the items for which the function of the index named 'name'
+           returns 'value', in the order they were given that value.
+
+        Parameters:
+            name (str): Name of an index declared with add_index.
+            value (immutable): Value returned by the index's function.
+
+        Return:
+            (list): Items with this value, empty if there are none.
+
+        Raises:
+            (ValueError): If there is no index named 'name'.
+        """
+        try:
+            index = self._indexes[name]
+        except KeyError as exc:
+            raise ValueError("no index named {!r}".format(name)) from exc
+        if self._lazy:
+            self._build_all()
+        if self._stale_indexes:
+            for stale in self._indexes.values():
+                stale.rebuild(self._items)
+            self._stale_indexes = False
+        return list(index.buckets.get(value, {}).values())
 
     def get_items(self):
         """(list) All items in this collection."""
+        if self._lazy:
+            self._build_all()
         return list(self._items.values())
 
+    def view_items(self):
+        """(ReadOnlyView) All items in this collection.
+
+        The items are copied into a list at most once between changes to this
+        collection, and that list is shared by every view taken in between.
+        A view therefore does not see items added after it was taken.
+        """
+        if self._lazy:
+            self._build_all()
+        if self._values is None:
+            self._values = list(self._items.values())
+        return ReadOnlyView(self._values)
+
+    def clear(self):
+        """Removes every item from this collection and forgets their IDs."""
+        self._items.clear()
+        self._ids.clear()
+        self._keys.clear()
+        for index in self._indexes.values():
+            index.rebuild(self._items)
+        self._stale_indexes = False
+        self._lazy = False
+        self._values = None
+
     def find_item(self, key):
         """Return the item which corresponds to this key.
 
@@ -292,22 +1003,463 @@ class ManagedDictionary(object):
         Raises:
             (KeyError): If 'key' does not correspond to an item.
         """
-        return self._items[key]
+        item = self._items[key]
+        if self._lazy and isinstance(item, _Lazy):
+            item = self._items[key] = item.get()
+            self._values = None
+            if self._indexes:
+                self._stale_indexes = True
+        return item
+
+    def get_id(self, key):
+        """Return the integer ID of the item which corresponds to this key.
+
+        Parameters:
+            key (immutable): Unique key for an item.
+
+        Return:
+            int: Position of the key among all keys, in the order added.
+
+        Raises:
+            (KeyError): If 'key' does not correspond to an item.
+        """
+        if key not in self._ids and len(self._keys) < len(self._items):
+            self._add_ids()
+        return self._ids[key]
+
+    def get_key(self, item_id):
+        """Return the key of the item with this integer ID.
+
+        Parameters:
+            item_id (int): ID returned by get_id.
+
+        Return:
+            (immutable): Unique key for the item.
+
+        Raises:
+            (IndexError): If 'item_id' is not the ID of an item.
+        """
+        if item_id < 0:
+            raise IndexError("item ID out of range")
+        if item_id >= len(self._keys):
+            self._add_ids()
+        return self._keys[item_id]
+
+    def find_item_by_id(self, item_id):
+        """Return the item with this integer ID.
+
+        Parameters:
+            item_id (int): ID returned by get_id.
+
+        Return:
+            (value): Item with this ID.
+
+        Raises:
+            (IndexError): If 'item_id' is not the ID of an item.
+        """
+        return self.find_item(self.get_key(item_id))
+
+    def _add_ids(self):
+        """Gives an ID to each key added since IDs were last given.
+
+        Keys keep their position in _items when their item is overwritten
+        and are only removed by clear, so existing IDs never change.
+        """
+        keys = self._keys
+        fresh = list(islice(self._items, len(keys), None))
+        self._ids.update(zip(fresh, range(len(keys), len(keys) + len(fresh))))
+        keys.extend(fresh)
+
+    def find_items(self, keys, missing="raise", default=None):
+        """Return the items which correspond to these keys, in the same order.
+
+        Parameters:
+            keys (iterable): Unique keys for items.
+            missing (str): What to do with a key that does not correspond to an
+                           item. "raise" raises KeyError, "skip" leaves it out
+                           of the returned list and "default" returns 'default'
+                           in its place.
+            default (value): Item returned for missing keys when 'missing' is
+                             "default".
+
+        Return:
+            (list): Items that correspond to these keys.
+
+        Raises:
+            (KeyError): If 'missing' is "raise" and a key does not correspond
+                        to an item.
+            (ValueError): If 'missing' is not one of the options above.
+        """
+        items = self._items
+        if self._lazy:
+            find = self.find_item
+            if missing == "raise":
+                return [find(key) for key in keys]
+            elif missing == "skip":
+                return [find(key) for key in keys if key in items]
+            elif missing == "default":
+                return [find(key) if key in items else default for key in keys]
+        elif missing == "raise":
+            return [items[key] for key in keys]
+        elif missing == "skip":
+            return [items[key] for key in keys if key in items]
+        elif missing == "default":
+            return [items.get(key, default) for key in keys]
+        raise ValueError("missing must be 'raise', 'skip' or 'default'")
+
+    def _build_all(self):
+        """Builds every unbuilt item in this collection."""
+        for key, item in self._items.items():
+            if isinstance(item, _Lazy):
+                self._items[key] = item.get()
+        self._lazy = False
+        self._values = None
+        if self._indexes:
+            self._stale_indexes = True
+
+    def __len__(self):
+        """(int) Number of items in this collection."""
+        return len(self._items)
+
+    def __contains__(self, key):
+        """(bool) True if 'key' corresponds to an item in this collection."""
+        return key in self._items
+
+    def __iter__(self):
+        """Iterates over the keys of this collection, as 'in' tests them,
+           without copying them. view_items gives the items.
+        """
+        return iter(self._items)
+
+
+class _Index(object):
+    """A secondary index of a ManagedDictionary's items."""
+
+    __slots__ = ("function", "buckets", "values")
+
+    def __init__(self, function):
+        """
+        Parameters:
+            function (callable): Computes the indexed value of an item.
+        """
+        self.function = function
+        self.buckets = {}  # indexed value -> {key: item}, in the order added
+        self.values = {}  # key -> indexed value of the key's item
+
+    def add(self, key, item):
+        """Indexes 'item', replacing the item previously added with 'key'."""
+        value = self.function(item)
+        previous = self.values.get(key, value)
+        if previous != value:
+            bucket = self.buckets[previous]
+            del bucket[key]
+            if not bucket:
+                del self.buckets[previous]
+        self.values[key] = value
+        self.buckets.setdefault(value, {})[key] = item
+
+    def rebuild(self, items):
+        """Indexes every item in the dict 'items' afresh."""
+        self.buckets = {}
+        self.values = {}
+        for key, item in items.items():
+            self.add(key, item)
+
+
+def add_standard_indexes():
+    """Declares the commonly used secondary indexes of the global collections,
+       as described by Dataset.add_standard_indexes.
+    """
+    default_dataset.add_standard_indexes()
+
+
+def _athlete_country_code(athlete):
+    """(str) Code of the athlete's country, for the "country" index."""
+    return athlete.get_country().get_country_code()
+
+
+def _athlete_surname(athlete):
+    """(str) Athlete's lower case surname, for the "surname" index."""
+    return athlete.surname.lower()
+
+
+class _Lazy(object):
+    """Placeholder for an entity which is built the first time it is accessed."""
+
+    __slots__ = ("_item",)
+
+    def __init__(self):
+        self._item = None
+
+    def get(self):
+        """Return the entity, building it on the first call."""
+        if self._item is None:
+            self._item = self._build()
+        return self._item
+
+    def _build(self):
+        """Abstract method which builds the entity."""
+        raise NotImplementedError()
+
+
+class _LazyAthlete(_Lazy):
+    """An athlete's raw row and results, built into an Athlete on first access.
+    """
+
+    __slots__ = ("_row", "_country", "results")
+
+    def __init__(self, row, country):
+        """
+        Parameters:
+            row (list[str]): Athlete's identifier, first name and surname.
+            country (Country): Object representing this athlete's country.
+        """
+        super().__init__()
+        self._row = row
+        self._country = country
+        self.results = []  # (event, value) pairs in the order they were read
+
+    def _build(self):
+        """(Athlete) Builds the athlete with their events and results."""
+        identifier, first_name, surname = self._row
+        athlete = Athlete(identifier, first_name, surname, self._country)
+        for event, value in self.results:
+            athlete.add_event(event)
+            _add_result_value(athlete, event, value)
+        self._row = self._country = self.results = None
+        return athlete
+
+
+def _build_all(entities, members):
+    """Replaces every _Lazy placeholder in the list 'entities' and the set
+       'members' with its entity.
+
+    Return:
+        bool: False, as no placeholders remain.
+    """
+    for i, entity in enumerate(entities):
+        if isinstance(entity, _Lazy):
+            entities[i] = entity.get()
+            members.discard(entity)
+            members.add(entities[i])
+    return False
+
+
+class ResultsFeed(object):
+    """Applies results appended to the results files since they were last read.
+
+    Complete rows added to the end of each file are loaded into the existing
+    athletes and events, so only the events they touch need to be placed again.
+    """
+
+    def __init__(self, results_files, from_end=False, dataset=None):
+        """
+        Parameters:
+            results_files (list[str]): Names of the results files to follow.
+            from_end (bool): If True, only rows appended after the feed is
+                             created are applied, e.g. when load_data has
+                             already loaded the files. Otherwise every row is.
+            dataset (Dataset): Dataset whose athletes and events the results
+                               are added to, default_dataset if not given.
+        """
+        self._dataset = dataset or default_dataset
+        self._offsets = {}
+        for filename in results_files:
+            self._offsets[filename] = os.path.getsize(filename) if from_end else 0
+
+    def get_offset(self, filename):
+        """(int) Byte offset up to which the named file has been applied."""
+        return self._offsets[filename]
+
+    def update(self):
+        """Applies every complete row appended to the results files since the
+           last update. A partly written last row is left for the next update.
+
+        Return:
+            set[Event]: Events which had results added or replaced.
+
+        Raises:
+            ValueError: If a results file is now shorter than has been read.
+        """
+        touched = set()
+
+        def find_event(event_name):
+            event = self._dataset.events.find_item(event_name)
+            touched.add(event)
+            return event
+
+        for filename, offset in self._offsets.items():
+            with open(filename, "rb") as raw_results:
+                if os.fstat(raw_results.fileno()).st_size < offset:
+                    raise ValueError("{} has been truncated".format(filename))
+                raw_results.seek(offset)
+                appended = raw_results.read()
+            end = appended.rfind(b'\n') + 1
+            rows = (row.split(',') for row in appended[:end].decode().splitlines())
+            _add_results(self._dataset,
+                         ((athlete_id, event_name, float(value))
+                          for athlete_id, event_name, value in rows),
+                         find_event=find_event)
+            self._offsets[filename] = offset + end
+        return touched
+
+
+_bulk_lock = threading.Lock()  # held by a bulk load, and guards _frozen_count
+_frozen_count = 0  # datasets whose bulk load froze objects with gc.freeze
+
+
+@contextmanager
+def _bulk_loading(dataset):
+    """Runs the 'with' block, a bulk load into 'dataset', with the cyclic
+       garbage collector disabled, then freezes every object alive. Waits
+       for any other bulk load to finish first.
+    """
+    global _frozen_count
+    with _bulk_lock:
+        gc.collect()  # so that no garbage is frozen with the entities
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            yield
+            # Frozen before the collector is enabled again, or its first
+            # collection would scan every object allocated by the load.
+            gc.freeze()
+            if not dataset._frozen:
+                dataset._frozen = True
+                _frozen_count += 1
+        finally:
+            if enabled:
+                gc.enable()
+
+
+class Dataset(object):
+    """The athletes, countries and events of one Games.
+
+    Each dataset owns its collections, so that one process can keep several
+    Games loaded and query them without reloading. The global collections
+    and load_data use default_dataset.
+    """
+
+    def __init__(self):
+        self.athletes = ManagedDictionary()
+        self.countries = ManagedDictionary()
+        self.events = ManagedDictionary()
+        self._load_stats = {}  # statistics of the last call to load_data
+        self._frozen = False  # a bulk load has frozen objects with gc.freeze
+
+    def load_data(self, athletes, countries, events,
+                  timed_events_results, scored_events_results,
+                  use_mmap=False, use_numpy=False, lazy=False, snapshot=None,
+                  fixed_point=None, bulk=False):
+        """Loads the data from the named data files into this dataset.
+
+        Data is loaded into the athletes, countries and events collections.
+        Results are accessible through the objects in these collections.
+
+        Parameters:
+            athletes (str) : Name of file containing athlete data.
+            countries (str): Name of file containing country data.
+            events (str)   : Name of file containing events data.
+            timed_events_results (str) : Name of file containing results for
+                                         timed events.
+            scored_events_results (str): Name of file containing results for
+                                         scored events.
+            use_mmap (bool): If True, the results files are memory mapped and
+                             scanned as bytes, decoding each distinct athlete
+                             identifier and event name only once.
+            use_numpy (bool): If True, the results files are read into NumPy
+                              arrays in bulk (requires NumPy). Cannot be
+                              combined with use_mmap.
+            lazy (bool): If True, athletes and their results are kept as raw
+                         rows and only built when first found or listed,
+                         either from the athletes collection or through their
+                         events and countries. Cannot be combined with
+                         use_mmap, use_numpy or snapshot, as a snapshot holds
+                         every athlete built.
+            snapshot (str): Name of a snapshot file. If it was written from
+                            data files of the same size, modification time and
+                            content, the collections are restored from it
+                            instead of being parsed. Otherwise the files are
+                            parsed and the snapshot is rewritten.
+            fixed_point (int): If given, every event's results are held as
+                               fixed point integers with this many units per
+                               second or point (see Event.set_fixed_point).
+            bulk (bool): If True, existing garbage is collected, then the
+                         cyclic garbage collector is disabled while loading,
+                         as the loaded entities are all kept. Every object
+                         alive afterwards is frozen with gc.freeze so that
+                         later collections do not scan them, until clear
+                         unfreezes them. As the collector's state belongs to
+                         the process, bulk loads wait for each other.
+
+        The time taken and the garbage collections run by each load are
+        available from get_load_stats.
+        """
+        _check_scale(fixed_point)
+        with _bulk_loading(self) if bulk else nullcontext():
+            monitor = _GCMonitor(self._load_stats)
+            try:
+                _load_data(self, athletes, countries, events,
+                           timed_events_results, scored_events_results,
+                           use_mmap, use_numpy, lazy, snapshot, fixed_point)
+            finally:
+                monitor.stop()
+
+    def get_load_stats(self):
+        """Return the time taken and garbage collections run by the last load.
+
+        Return:
+            dict: "elapsed" (float) seconds taken by load_data, "gc_pause"
+                  (float) seconds spent in garbage collection, "collections"
+                  (tuple[int]) number of collections of each generation and
+                  "collected" (int) number of objects freed. Empty before the
+                  first load.
+        """
+        return dict(self._load_stats)
+
+    def add_standard_indexes(self):
+        """Declares the commonly used secondary indexes of the collections:
+           events by "timed" (Event.is_timed), athletes by "country" (the
+           country code) and athletes by "surname" (the lower case surname).
+        """
+        self.events.add_index("timed", Event.is_timed)
+        self.athletes.add_index("country", _athlete_country_code)
+        self.athletes.add_index("surname", _athlete_surname)
+
+    def clear(self):
+        """Removes every athlete, country and event from this dataset.
+
+        gc.unfreeze can only unfreeze every frozen object at once, so the
+        entities frozen by bulk loads are unfrozen, and can be collected, when
+        the last dataset which a bulk load froze is cleared.
+        """
+        global _frozen_count
+        for collection in (self.athletes, self.countries, self.events):
+            collection.clear()
+        with _bulk_lock:
+            if self._frozen:
+                self._frozen = False
+                _frozen_count -= 1
+                if not _frozen_count:
+                    gc.unfreeze()
 
 
 """
     Globally defined collections of all key entity objects.
     These are to be used to store all of each type of entity objects that
-    are created by your program.
+    are created by your program. They are the collections of default_dataset.
 """
-all_athletes = ManagedDictionary()
-all_countries = ManagedDictionary()
-all_events = ManagedDictionary()
+default_dataset = Dataset()
+all_athletes = default_dataset.athletes
+all_countries = default_dataset.countries
+all_events = default_dataset.events
 
 
 # done
 def load_data(athletes, countries, events,
-              timed_events_results, scored_events_results):
+              timed_events_results, scored_events_results,
+              use_mmap=False, use_numpy=False, lazy=False, snapshot=None,
+              fixed_point=None, bulk=False):
     """Loads the data from the named data files.
 
     Data is loaded into the all_athletes, all_countries and all_events
@@ -321,35 +1473,711 @@ def load_data(athletes, countries, events,
                                      events.
         scored_events_results (str): Name of file containing results for scored
                                      events.
+
+    The other parameters are described in Dataset.load_data.
+    """
+    default_dataset.load_data(athletes, countries, events,
+                              timed_events_results, scored_events_results,
+                              use_mmap, use_numpy, lazy, snapshot,
+                              fixed_point, bulk)
+
+
+def get_load_stats():
+    """Return the time taken and garbage collections run by the last load of
+       the global collections, as described by Dataset.get_load_stats.
+    """
+    return default_dataset.get_load_stats()
+
+
+class _GCMonitor(object):
+    """Records the garbage collections run between its creation and stop()."""
+
+    def __init__(self, stats):
+        """
+        Parameters:
+            stats (dict): Replaced with the statistics when stopped.
+        """
+        self._stats = stats
+        self._collections = [0] * len(gc.get_count())
+        self._collected = 0
+        self._pause = 0.0
+        self._started = None  # time the current collection started
+        self._start = time.perf_counter()
+        gc.callbacks.append(self._callback)
+
+    def _callback(self, phase, info):
+        """Called by gc at the start and stop of each collection."""
+        if phase == "start":
+            self._started = time.perf_counter()
+        elif self._started is not None:
+            self._pause += time.perf_counter() - self._started
+            self._started = None
+            self._collections[info["generation"]] += 1
+            self._collected += info["collected"]
+
+    def stop(self):
+        """Stops recording and stores the statistics."""
+        gc.callbacks.remove(self._callback)
+        self._stats.clear()
+        self._stats.update(elapsed=time.perf_counter() - self._start,
+                           gc_pause=self._pause,
+                           collections=tuple(self._collections),
+                           collected=self._collected)
+
+
+def _load_data(dataset, athletes, countries, events, timed_events_results,
+               scored_events_results, use_mmap, use_numpy, lazy,
+               snapshot, fixed_point):
+    """Loads the data files into 'dataset' as described by Dataset.load_data.
+    """
+    if use_mmap and use_numpy:
+        raise ValueError("use_mmap and use_numpy cannot both be selected")
+    elif lazy and (use_mmap or use_numpy or snapshot is not None):
+        raise ValueError("lazy cannot be combined with use_mmap, use_numpy "
+                         "or snapshot")
+    if snapshot is not None:
+        key = _snapshot_key([athletes, countries, events,
+                             timed_events_results, scored_events_results])
+        if _restore_snapshot(dataset, snapshot, key):
+            _set_fixed_point(dataset, fixed_point)
+            return
+    add_athletes = _add_lazy_athletes if lazy else _add_athletes
+    if use_mmap:
+        read_results = iter_mapped_results
+        add_results = _add_mapped_results
+    elif use_numpy:
+        read_results = read_result_arrays
+        add_results = _add_result_arrays
+    elif lazy:
+        read_results = iter_results
+        add_results = _add_lazy_results
+    else:
+        read_results = iter_results
+        add_results = _add_results
+    _add_countries(dataset, iter_rows(countries))
+    add_athletes(dataset, iter_rows(athletes))
+    _add_events(dataset, iter_rows(events))
+    _set_fixed_point(dataset, fixed_point)
+    add_results(dataset, read_results(timed_events_results))
+    add_results(dataset, read_results(scored_events_results))
+    if snapshot is not None:
+        _write_snapshot(dataset, snapshot, key)
+
+
+_SNAPSHOT_VERSION = 2
+_SNAPSHOT_ARRAYS = ("members", "competing", "results", "registered")
+
+
+def _snapshot_key(filenames):
+    """Identifies the contents of the named data files.
+
+    Parameters:
+        filenames (list[str]): Names of the data files.
+
+    Return:
+        list[tuple]: Size, modification time and SHA-256 digest of each file.
+    """
+    key = []
+    for filename in filenames:
+        digest = hashlib.sha256()
+        with open(filename, "rb") as raw_data:
+            for block in iter(lambda: raw_data.read(1 << 20), b''):
+                digest.update(block)
+            stat = os.fstat(raw_data.fileno())
+        key.append((stat.st_size, stat.st_mtime_ns, digest.hexdigest()))
+    return key
+
+
+def _flatten(groups):
+    """Flattens lists of integers into a pair of arrays.
+
+    Parameters:
+        groups (iterable[list[int]]): The lists of integers.
+
+    Return:
+        tuple(array, array): The concatenated integers and the length of each
+                             list.
+    """
+    values = array('q')
+    lengths = array('q')
+    for group in groups:
+        values.extend(group)
+        lengths.append(len(group))
+    return values, lengths
+
+
+def _unflatten(items, values, lengths):
+    """Reverses _flatten, mapping each integer to the item at that index.
+
+    Parameters:
+        items (list): Items indexed by the flattened integers.
+        values (array): The concatenated integers.
+        lengths (array): The length of each list.
+
+    Yield:
+        list: The items of each list.
     """
-    with open(countries, "r") as raw_countries:
-        for row in raw_countries:
-            row = row.rstrip('\n').split(',')
-            all_countries.add_item(row[0], Country(row[1], row[0]))
-    with open(athletes, "r") as raw_athletes:
-        for row in raw_athletes:
-            row = row.rstrip('\n').split(',')
-            all_athletes.add_item(row[0], Athlete(row[0], row[1], row[2], all_countries.find_item(row[3])))
-    with open(events, "r") as raw_events:
-        for row in raw_events:
-            row = row.rstrip('\n').split(',')
-            all_events.add_item(row[0], Event(row[0], row[1], []))
-    with open(timed_events_results, "r") as raw_timed_events_results:
-        for row in raw_timed_events_results:
-            row = row.rstrip('\n').split(',')
-            all_events.find_item(row[1]).add_athlete(all_athletes.find_item(row[0]))
-            all_athletes.find_item(row[0]).add_event(all_events.find_item(row[1]))
-            all_athletes.find_item(row[0]).add_result(all_events.find_item(row[1]), Result(row[2]))
-    with open(scored_events_results, "r") as raw_scored_events_results:
-        for row in raw_scored_events_results:
-            row = row.rstrip('\n').split(',')
-            all_events.find_item(row[1]).add_athlete(all_athletes.find_item(row[0]))
-            all_athletes.find_item(row[0]).add_event(all_events.find_item(row[1]))
-            all_athletes.find_item(row[0]).add_result(all_events.find_item(row[1]), Result(row[2]))
-    for athlete in all_athletes.get_items():
-        all_countries.find_item(athlete.get_country().get_country_code()).add_athlete(athlete)
+    start = 0
+    for length in lengths:
+        yield [items[i] for i in values[start:start + length]]
+        start += length
 
 
+def _write_snapshot(dataset, snapshot, key):
+    """Writes the contents of the dataset's collections to the named snapshot.
+
+    Entities refer to each other by their collection ID, which is also their
+    position in the snapshot, and the relationships are stored as flat
+    arrays. The snapshot is a line of JSON holding the entities' fields,
+    followed by the arrays' raw bytes, so that reading it back runs no code
+    from the file and the arrays are read without parsing.
+    A snapshot that cannot be written is skipped, as it is only a cache.
+
+    Parameters:
+        dataset (Dataset): Dataset to be written.
+        snapshot (str): Name of the snapshot file.
+        key (list[tuple]): Identity of the data files, from _snapshot_key.
+    """
+    countries = dataset.countries.get_items()
+    athletes = dataset.athletes.get_items()
+    events = dataset.events.get_items()
+    country_id = dataset.countries.get_id
+    athlete_id = dataset.athletes.get_id
+    event_id = dataset.events.get_id
+    try:
+        arrays = {
+            "members": _flatten([athlete_id(athlete.identifier)
+                                 for athlete in country.get_athletes()]
+                                for country in countries),
+            "competing": _flatten([event_id(event.event_name)
+                                   for event in athlete.get_events()]
+                                  for athlete in athletes),
+            "results": _flatten([event_id(event.event_name)
+                                 for event in athlete.results]
+                                for athlete in athletes),
+            "registered": _flatten([athlete_id(athlete.identifier)
+                                    for athlete in event.get_athletes()]
+                                   for event in events),
+        }
+        values = array('d', [result.result_value
+                             for athlete in athletes
+                             for result in athlete.results.values()])
+        header = {
+            "version": _SNAPSHOT_VERSION,
+            "key": key,
+            "byteorder": sys.byteorder,
+            "countries": [(country.get_country_code(), country.get_name())
+                          for country in countries],
+            "athletes": [(athlete.get_id(), athlete.first_name,
+                          athlete.surname,
+                          country_id(athlete.country.country_code))
+                         for athlete in athletes],
+            "events": [(event.get_name(), event.is_timed())
+                       for event in events],
+            "sizes": [(len(arrays[name][0]), len(arrays[name][1]))
+                      for name in _SNAPSHOT_ARRAYS],
+        }
+        with open(snapshot + ".tmp", "wb") as raw_snapshot:
+            raw_snapshot.write(json.dumps(header).encode() + b"\n")
+            for name in _SNAPSHOT_ARRAYS:
+                arrays[name][0].tofile(raw_snapshot)
+                arrays[name][1].tofile(raw_snapshot)
+            values.tofile(raw_snapshot)
+        os.replace(snapshot + ".tmp", snapshot)
+    except (KeyError, OSError):
+        pass
+
+
+def _read_snapshot(snapshot, key):
+    """Reads the header and arrays of the named snapshot.
+
+    Parameters:
+        snapshot (str): Name of the snapshot file.
+        key (list[tuple]): Identity of the data files, from _snapshot_key.
+
+    Return:
+        tuple(dict, dict, array): The header, the (values, lengths) arrays by
+                                  name and the result values, or None if the
+                                  snapshot is missing, stale or corrupt.
+    """
+    try:
+        with open(snapshot, "rb") as raw_snapshot:
+            header = json.loads(raw_snapshot.readline())
+            if (type(header) is not dict
+                    or header.get("version") != _SNAPSHOT_VERSION
+                    or header.get("key") != [list(part) for part in key]
+                    or header.get("byteorder") != sys.byteorder):
+                return None
+            sizes = header["sizes"]
+            # The arrays fill the rest of the file, so that a corrupt header
+            # cannot make them read past its end.
+            items = sum(count + groups for count, groups in sizes) + sizes[2][0]
+            if (raw_snapshot.tell() + items * 8
+                    != os.fstat(raw_snapshot.fileno()).st_size):
+                return None
+            arrays = {}
+            for name, (count, groups) in zip(_SNAPSHOT_ARRAYS, sizes):
+                values = array('q')
+                values.fromfile(raw_snapshot, count)
+                lengths = array('q')
+                lengths.fromfile(raw_snapshot, groups)
+                if (sum(lengths) != count or min(lengths, default=0) < 0
+                        or min(values, default=0) < 0):
+                    return None
+                arrays[name] = (values, lengths)
+            values = array('d')
+            values.fromfile(raw_snapshot, len(arrays["results"][0]))
+    except (OSError, EOFError, ValueError, TypeError, KeyError):
+        return None
+    return header, arrays, values
+
+
+def _restore_snapshot(dataset, snapshot, key):
+    """Restores the dataset's collections from the named snapshot.
+
+    Nothing is added to the collections unless the whole snapshot is read.
+
+    Parameters:
+        dataset (Dataset): Dataset to be restored.
+        snapshot (str): Name of the snapshot file.
+        key (list[tuple]): Identity of the data files, from _snapshot_key.
+
+    Return:
+        bool: True if the snapshot was restored, False if it is missing,
+              stale or corrupt.
+    """
+    read = _read_snapshot(snapshot, key)
+    if read is None:
+        return False
+    header, arrays, values = read
+    try:
+        countries = [Country(name, code) for code, name in header["countries"]]
+        athletes = [Athlete(identifier, _intern(first_name), _intern(surname),
+                            countries[country])
+                    for identifier, first_name, surname, country
+                    in header["athletes"]]
+        events = [Event(name, timed, []) for name, timed in header["events"]]
+        if (len(arrays["members"][1]) != len(countries)
+                or len(arrays["registered"][1]) != len(events)
+                or len(arrays["competing"][1]) != len(athletes)
+                or len(arrays["results"][1]) != len(athletes)):
+            return False
+        for country, members in zip(countries,
+                                    _unflatten(athletes, *arrays["members"])):
+            country.add_athletes(members)
+        for event, registered in zip(events, _unflatten(
+                athletes, *arrays["registered"])):
+            event.add_athletes(registered)
+        for athlete, competing in zip(athletes,
+                                      _unflatten(events, *arrays["competing"])):
+            athlete.add_events(competing)
+        values = iter(values)
+        for athlete, results in zip(athletes,
+                                    _unflatten(events, *arrays["results"])):
+            for event in results:
+                athlete.add_result(event, event.result_store.add(
+                    athlete, next(values)))
+    except (ValueError, TypeError, KeyError, IndexError):
+        return False
+    dataset.countries.add_items((country.get_country_code(), country)
+                            for country in countries)
+    dataset.athletes.add_items((athlete.get_id(), athlete) for athlete in athletes)
+    dataset.events.add_items((event.get_name(), event) for event in events)
+    return True
+
+
+# Names shared by many athletes are stored once. Event names and country codes
+# are already held once each, by their Event and Country.
+_intern = sys.intern
+
+
+def _add_countries(dataset, rows):
+    """Adds a country to dataset.countries for each (code, name) row."""
+    dataset.countries.add_items((code, Country(name, code)) for code, name in rows)
+
+
+def _add_athletes(dataset, rows):
+    """Adds an athlete to dataset.athletes and to their country's delegation for
+       each (identifier, first_name, surname, country_code) row.
+    """
+    for identifier, first_name, surname, code in rows:
+        country = dataset.countries.find_item(code)
+        athlete = Athlete(identifier, _intern(first_name), _intern(surname),
+                          country)
+        dataset.athletes.add_item(identifier, athlete)
+        country.add_athlete(athlete)
+
+
+def _add_lazy_athletes(dataset, rows):
+    """Adds an unbuilt athlete to dataset.athletes and to their country's
+       delegation for each (identifier, first_name, surname, country_code) row.
+    """
+    for identifier, first_name, surname, code in rows:
+        country = dataset.countries.find_item(code)
+        athlete = _LazyAthlete((identifier, _intern(first_name),
+                                _intern(surname)), country)
+        dataset.athletes.add_lazy_item(identifier, athlete)
+        country._add_unbuilt(athlete)
+
+
+def _add_events(dataset, rows):
+    """Adds an event to dataset.events for each (name, TIMED|SCORED) row."""
+    dataset.events.add_items((name, Event(name, timed, [])) for name, timed in rows)
+
+
+def _set_fixed_point(dataset, scale):
+    """Holds the results of every event in 'dataset' as fixed point integers
+       with 'scale' units per second or point, if 'scale' is not None.
+    """
+    if scale is not None:
+        for event in dataset.events._items.values():
+            event.set_fixed_point(scale)
+
+
+def _add_results(dataset, rows, find_athlete=None, find_event=None):
+    """Adds the results in 'rows', linking each athlete to the event.
+
+    Each row's athlete and event are looked up once, then the result,
+    the athlete's event and the event's athlete are added together.
+
+    Parameters:
+        dataset (Dataset): Dataset to which the results are added.
+        rows (iterable[tuple]): (athlete_id, event_name, value) results rows.
+        find_athlete (callable): Finds an athlete by a row's identifier,
+                                 defaults to dataset.athletes.find_item.
+        find_event (callable): Finds an event by a row's event name,
+                               defaults to dataset.events.find_item.
+    """
+    find_athlete = find_athlete or dataset.athletes.find_item
+    find_event = find_event or dataset.events.find_item
+    for athlete_id, event_name, value in rows:
+        athlete = find_athlete(athlete_id)
+        event = find_event(event_name)
+        # Event.add_athlete and Athlete.add_event, inlined for speed.
+        if event._lazy:
+            event.add_athlete(athlete)
+        elif athlete not in event._athlete_set:
+            event._athlete_set.add(athlete)
+            event.athletes.append(athlete)
+        if event not in athlete.events:
+            athlete.events.append(event)
+        _add_result_value(athlete, event, value)
+
+
+def _add_result_value(athlete, event, value):
+    """Sets the athlete's result in 'event' to 'value', storing it directly
+       in the event's ResultStore.
+    """
+    results = athlete.results
+    results[event] = event.result_store.add(athlete, value, results.get(event))
+
+
+def _add_lazy_results(dataset, rows):
+    """Adds the results in 'rows' to the athletes added by _add_lazy_athletes.
+
+    The results of athletes who are still unbuilt are kept as raw
+    (event, value) pairs until the athlete is built.
+
+    Parameters:
+        dataset (Dataset): Dataset to which the results are added.
+        rows (iterable[tuple]): (athlete_id, event_name, value) results rows.
+    """
+    athletes = dataset.athletes._items
+    find_event = dataset.events.find_item
+    for athlete_id, event_name, value in rows:
+        athlete = athletes[athlete_id]
+        event = find_event(event_name)
+        if type(athlete) is _LazyAthlete:
+            event._add_unbuilt(athlete)
+            if athlete.results is not None:
+                athlete.results.append((event, value))
+                continue
+            athlete = athlete.get()
+        else:
+            event.add_athlete(athlete)
+        athlete.add_event(event)
+        _add_result_value(athlete, event, value)
+
+
+def _add_mapped_results(dataset, rows):
+    """Adds the results in 'rows' read by iter_mapped_results.
+
+    Parameters:
+        dataset (Dataset): Dataset to which the results are added.
+        rows (iterable[tuple]): (athlete_id, event_name, value) results rows,
+                                with the identifier and name as bytes.
+    """
+    _add_results(dataset, rows, _decoding_finder(dataset.athletes),
+                 _decoding_finder(dataset.events))
+
+
+def _add_result_arrays(dataset, arrays):
+    """Adds the results read by read_result_arrays.
+
+    Each distinct athlete and event is looked up once. As with _add_results,
+    only the last row of an athlete in an event is kept, at the position of
+    their first row. The rows of each event are then appended to its
+    ResultStore's columns in bulk, so only the Result and the registrations
+    are made per row. Events which already have athletes are linked row by
+    row by _add_results.
+
+    Parameters:
+        dataset (Dataset): Dataset to which the results are added.
+        arrays (tuple): Arrays returned by read_result_arrays.
+    """
+    athlete_codes, athlete_ids, event_codes, event_names, values = arrays
+    athletes = dataset.athletes.find_items(athlete_ids)
+    events = dataset.events.find_items(event_names)
+    if any(event.athletes or len(event.result_store) for event in events):
+        _add_results(dataset,
+                     zip(athlete_codes.tolist(), event_codes.tolist(),
+                         values.tolist()),
+                     athletes.__getitem__, events.__getitem__)
+        return
+    pairs = event_codes.astype(numpy.int64) * len(athletes) + athlete_codes
+    _, first = numpy.unique(pairs, return_index=True)
+    _, last = numpy.unique(pairs[::-1], return_index=True)
+    order = numpy.argsort(first)
+    kept = first[order]
+    values = values[len(pairs) - 1 - last[order]]
+    athlete_codes = athlete_codes[kept]
+    event_codes = event_codes[kept]
+    # Stable, so each event's rows stay in the order of their first rows.
+    by_event = numpy.argsort(event_codes, kind="stable")
+    counts = numpy.bincount(event_codes, minlength=len(events))
+    ends = numpy.cumsum(counts)
+    rows = numpy.empty(len(kept), dtype=numpy.intp)
+    rows[by_event] = numpy.arange(len(kept)) - numpy.repeat(ends - counts,
+                                                            counts)
+    for code, event in enumerate(events):
+        indexes = by_event[ends[code] - counts[code]:ends[code]]
+        event_athletes = [athletes[athlete]
+                          for athlete in athlete_codes[indexes].tolist()]
+        event.athletes.extend(event_athletes)
+        event._athlete_set.update(event_athletes)
+        store = event.result_store
+        store.athletes.extend(event_athletes)
+        event_values = values[indexes]
+        if store.scale is None:
+            store.values.frombytes(event_values.tobytes())
+        else:
+            store.values.frombytes(
+                numpy.rint(event_values * store.scale).astype(numpy.int64)
+                .tobytes())
+        store.places.frombytes(bytes(len(indexes) * store.places.itemsize))
+    # Each athlete's rows in turn, in the order of their first rows.
+    by_athlete = numpy.argsort(athlete_codes, kind="stable")
+    for athlete, event, row in zip(athlete_codes[by_athlete].tolist(),
+                                   event_codes[by_athlete].tolist(),
+                                   rows[by_athlete].tolist()):
+        athlete = athletes[athlete]
+        event = events[event]
+        result = _new_result(Result)
+        result._store = event.result_store
+        result._row = row
+        athlete.results[event] = result
+        if event not in athlete.events:
+            athlete.events.append(event)
+
+
+def _decoding_finder(collection):
+    """Returns a function which finds items in 'collection' by bytes keys.
+
+    Each distinct key is decoded and looked up once, then remembered.
+
+    Parameters:
+        collection (ManagedDictionary): Collection keyed by str.
+
+    Return:
+        callable: Takes a bytes key and returns the corresponding item.
+    """
+    found = {}
+
+    def find_item(raw_key):
+        try:
+            return found[raw_key]
+        except KeyError:
+            item = found[raw_key] = collection.find_item(raw_key.decode())
+            return item
+    return find_item
+
+
+def iter_rows(filename):
+    """Yields the rows of the named data file one at a time.
+
+    Parameters:
+        filename (str): Name of a comma separated data file.
+
+    Yield:
+        list[str]: The fields of one row.
+    """
+    with open(filename, "r") as raw_rows:
+        for row in raw_rows:
+            yield row.rstrip('\n').split(',')
+
+
+def iter_results(filename):
+    """Yields the rows of the named results file without creating entities.
+
+    Only one row is held in memory at a time, so files larger than the
+    available memory can be processed.
+
+    Parameters:
+        filename (str): Name of file containing timed or scored results.
+
+    Yield:
+        tuple(str, str, float): Athlete's identifier, event name and the
+                                time or score achieved.
+    """
+    for athlete_id, event_name, value in iter_rows(filename):
+        yield athlete_id, event_name, float(value)
+
+
+def split_results(filename, parts):
+    """Splits the named results file into byte ranges of whole rows, so that
+       the ranges can be read separately, e.g. by different processes.
+
+    Parameters:
+        filename (str): Name of file containing timed or scored results.
+        parts (int): Number of ranges wanted.
+
+    Return:
+        list[tuple(int, int)]: Start and end offset of each range, in file
+                               order. There may be fewer than 'parts'.
+    """
+    size = os.path.getsize(filename)
+    bounds = [0]
+    with open(filename, "rb") as raw_results:
+        for part in range(1, parts):
+            offset = size * part // parts
+            if offset <= bounds[-1]:
+                continue
+            raw_results.seek(offset - 1)
+            raw_results.readline()  # to the start of the next row
+            if raw_results.tell() < size:
+                bounds.append(raw_results.tell())
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:])
+            if end > start]
+
+
+def iter_results_range(filename, start, end):
+    """Yields the rows of the named results file in one byte range given by
+       split_results.
+
+    Parameters:
+        filename (str): Name of file containing timed or scored results.
+        start (int): Offset of the first row.
+        end (int): Offset after the last row.
+
+    Yield:
+        tuple(str, str, float): Athlete's identifier, event name and the
+                                time or score achieved.
+    """
+    with open(filename, "rb") as raw_results:
+        raw_results.seek(start)
+        rows = raw_results.read(end - start).decode()
+    for row in rows.splitlines():
+        athlete_id, event_name, value = row.split(',')
+        yield athlete_id, event_name, float(value)
+
+
+_MAP_BLOCK = 1 << 16  # bytes of a mapped results file split at a time
+
+
+def iter_mapped_results(filename):
+    """Yields the rows of the named results file by scanning a memory map of it.
+
+    The mapped file is split into rows a block at a time rather than copied
+    line by line, so no str is decoded per line. The identifier and event
+    name are left as bytes for the caller to decode, the value is parsed
+    directly from its bytes.
+
+    Parameters:
+        filename (str): Name of file containing timed or scored results.
+
+    Yield:
+        tuple(bytes, bytes, float): Athlete's identifier, event name and the
+                                    time or score achieved.
+    """
+    with open(filename, "rb") as raw_results:
+        if os.fstat(raw_results.fileno()).st_size == 0:
+            return
+        with mmap.mmap(raw_results.fileno(), 0,
+                       access=mmap.ACCESS_READ) as data:
+            start = 0
+            while start < len(data):
+                # Each block ends after the first row ending past _MAP_BLOCK.
+                end = data.find(b'\n', start + _MAP_BLOCK) + 1 or len(data)
+                fields = data[start:end].replace(b'\n', b',').split(b',')
+                if len(fields) % 3:
+                    fields.pop()
+                yield from zip(fields[0::3], fields[1::3],
+                               map(float, fields[2::3]))
+                start = end
+
+
+def read_result_arrays(filename):
+    """Reads the named results file into NumPy arrays in bulk.
+
+    The columns are parsed by numpy.loadtxt, the identifiers and event names
+    as bytes. Each distinct athlete identifier and event name is given an
+    integer code by _encode, so no str is created per row.
+
+    Parameters:
+        filename (str): Name of file containing timed or scored results.
+
+    Return:
+        tuple(ndarray, list[str], ndarray, list[str], ndarray):
+            The athlete code of each row, the athlete identifier of each code,
+            the event code of each row, the event name of each code and the
+            float64 value of each row.
+
+    Raises:
+        ImportError: If NumPy is not installed.
+    """
+    if numpy is None:
+        raise ImportError("NumPy is required to read results into arrays")
+    if os.path.getsize(filename) == 0:
+        codes = numpy.zeros(0, dtype=numpy.intp)
+        return codes, [], codes, [], numpy.zeros(0, dtype=numpy.float64)
+    # Read as latin-1, each byte becomes one character and back again, so
+    # the keys hold the file's own bytes and are decoded once each.
+    keys = numpy.loadtxt(filename, dtype=bytes, delimiter=',', comments=None,
+                         usecols=(0, 1), ndmin=2, encoding="latin-1")
+    values = numpy.loadtxt(filename, dtype=numpy.float64, delimiter=',',
+                           comments=None, usecols=2, ndmin=1)
+    athlete_ids, athlete_codes = _encode(keys[:, 0])
+    event_names, event_codes = _encode(keys[:, 1])
+    return athlete_codes, athlete_ids, event_codes, event_names, values
+
+
+def _encode(keys):
+    """Encodes each key as its position among the distinct keys.
+
+    Keys are hashed eight bytes at a time and the hashes made unique, which
+    is much faster than sorting the keys. If two distinct keys have the same
+    hash, the keys themselves are made unique instead.
+
+    Parameters:
+        keys (ndarray): Bytes keys to be encoded.
+
+    Return:
+        tuple(list[str], ndarray): The distinct keys and the code of each key.
+    """
+    width = -(-keys.dtype.itemsize // 8) * 8
+    words = numpy.ascontiguousarray(keys, dtype="S{}".format(width))
+    words = words.view(numpy.uint64).reshape(len(keys), -1)
+    hashes = numpy.zeros(len(keys), dtype=numpy.uint64)
+    for column in words.T:  # FNV style: multiply, then mix in the next word
+        hashes *= numpy.uint64(0x100000001B3)
+        hashes ^= column
+    _, first, codes = numpy.unique(hashes, return_index=True,
+                                   return_inverse=True)
+    distinct = keys[first]
+    if not numpy.array_equal(distinct[codes], keys):
+        distinct, codes = numpy.unique(keys, return_inverse=True)
+    return [key.decode() for key in distinct.tolist()], codes.reshape(-1)
 
 
 if __name__ == "__main__":
@@ -10,13 +10,36 @@
                     competed in one event.
     DeterminePlaces: Determines the place ranking of all athletes who competed
                      in one event.
+    StreamCountryResults: Summarises the results of every country directly
+                          from the data files, in bounded memory.
+    ShardedResults: Places every event and summarises every country's results,
+                    sharding the events across worker processes.
+    DetermineAllPlaces: Determines the place ranking in every event at once,
+                        optionally sorting the events in worker processes.
+    Standings: Keeps the place ranking of one event up to date as single
+               results are added, corrected or removed.
+    MedalTable: Summarises the results of every country in one pass, ranked
+                by medals won.
+    LiveMedalTable: Keeps the medal table up to date as places change.
 """
 
 __author__ = "Caleb Aitken, 45309414"
 __email__ = "caleb@jasa.id.au"
 
+import os
+import sys
+import threading
+import zlib
+from bisect import bisect_left, insort
+from concurrent.futures import ProcessPoolExecutor
+from itertools import count
+
 from entities import Athlete, Result, Event, Country, ManagedDictionary
 from entities import all_athletes, all_countries, all_events, load_data
+from entities import iter_rows, iter_results
+from entities import split_results, iter_results_range
+from entities import add_place_observer, remove_place_observer
+from entities import batch_place_changes
 
 
 class ProcessResults(object):
@@ -61,7 +84,7 @@ class AthleteResults(ProcessResults):
         self._results = []
         for event in self._athlete.get_events():
             self._results.append([self._athlete.get_result(event), event])
-        self._results = sorted(sorted(self._results, key=lambda event: event[1].get_name()), key=lambda result: int(result[0].get_place()))
+        self._results = sorted(sorted(self._results, key=lambda event: event[1].get_name()), key=lambda result: result[0].get_place_number())
         self._results = [item[0] for item in self._results]
 
     def get_results(self):
@@ -119,9 +142,9 @@ class EventResults(ProcessResults):
         super().process()
         EventResults._event_results_counter += 1
         self._results = []
-        for athlete in self._event.get_athletes():
+        for athlete in self._event.view_athletes():
             self._results.append([athlete.get_result(self._event), athlete])
-        self._results = sorted(sorted(self._results, key=lambda athlete: athlete[1].get_full_name()), key=lambda result: int(result[0].get_place()))
+        self._results = sorted(sorted(self._results, key=lambda athlete: athlete[1].get_full_name()), key=lambda result: result[0].get_place_number())
         self._results = [item[1] for item in self._results]
 
     def get_results(self):
@@ -170,11 +193,12 @@ class CountryResults(ProcessResults):
         for athlete in self._country.get_athletes():
             self.num_athletes += 1
             for event in athlete.get_events():
-                if athlete.get_result(event).get_medal() == "Gold":
+                place = athlete.get_result(event).get_place_number()
+                if place == 1:
                     self.num_gold += 1
-                elif athlete.get_result(event).get_medal() == "Silver":
+                elif place == 2:
                     self.num_silver += 1
-                elif athlete.get_result(event).get_medal() == "Bronze":
+                elif place == 3:
                     self.num_bronze += 1
 
     def get_results(self):
@@ -250,24 +274,10 @@ class DeterminePlaces(ProcessResults):
         """
         super().process()
         DeterminePlaces._determine_places_counter += 1
-        self._results = []
-        for athlete in self._event.get_athletes():
-            self._results.append([athlete, athlete.get_result(self._event)])
-        if self._event.is_timed():
-            self._results = sorted(sorted(self._results, key=lambda athlete: athlete[0].get_full_name()), key=lambda result: float(result[1].get_result()))
-            self._results = [item[0] for item in self._results]
-        elif not self._event.is_timed():
-            self._results = sorted(sorted(self._results, key=lambda athlete: athlete[0].get_full_name()), key=lambda result: float(result[1].get_result()), reverse=True)
-            self._results = [item[0] for item in self._results]
-        self.place_counter = 0
-        self.previous_result = Result(-1)
-        for athlete in self._results:
-            self.place_counter += 1
-            if athlete.get_result(self._event).get_result() == self.previous_result.get_result():
-                athlete.get_result(self._event).set_place(self.previous_result.get_place())
-            else:
-                athlete.get_result(self._event).set_place(self.place_counter)
-                self.previous_result = athlete.get_result(self._event)
+        store = self._event.get_result_store()
+        rows, places = _rank_rows(store, self._event.is_timed())
+        self._results = list(map(store.athletes.__getitem__, rows))
+        store.set_places(rows, places)
 
     def get_results(self):
         """"""
@@ -289,6 +299,871 @@ class DeterminePlaces(ProcessResults):
         return ""
 
 
+class StreamCountryResults(ProcessResults):
+    """Determine the results achieved by every country, streaming the results
+       files rather than loading them into the entity collections.
+
+    Only the results that could still win a medal are kept for each event,
+    so memory use depends on the number of athletes, countries and events,
+    not on the size of the results files. As in load_data, the last row of
+    an athlete in an event replaces any earlier one. If so many contenders'
+    results are replaced by worse ones that results already dropped could
+    place again, that event alone is read again in full.
+    """
+
+    _stream_country_results_counter = 0
+
+    def __init__(self, athletes, countries, events,
+                 timed_events_results, scored_events_results):
+        """
+        Parameters:
+            athletes (str) : Name of file containing athlete data.
+            countries (str): Name of file containing country data.
+            events (str)   : Name of file containing events data.
+            timed_events_results (str) : Name of file containing results for
+                                         timed events.
+            scored_events_results (str): Name of file containing results for
+                                         scored events.
+        """
+        self._athletes = athletes
+        self._countries = countries
+        self._events = events
+        self._results_files = [timed_events_results, scored_events_results]
+
+    def process(self):
+        """
+        Stream every result, keeping the medal contenders of each event, then
+        count the gold, silver and bronze medals won by each country and the
+        number of athletes who competed for each country.
+        """
+        super().process()
+        StreamCountryResults._stream_country_results_counter += 1
+        self._results, athlete_countries, timed_events = _read_games(
+            self._athletes, self._countries, self._events)
+        contenders = {name: _Contenders() for name in timed_events}
+        for results_file in self._results_files:
+            for athlete_id, event_name, value in iter_results(results_file):
+                contenders[event_name].add(
+                    value if timed_events[event_name] else -value, athlete_id)
+        rankings = {name: event_contenders.ranked
+                    for name, event_contenders in contenders.items()}
+        stale = {name: {} for name, event_contenders in contenders.items()
+                 if not event_contenders.is_exact()}
+        if stale:
+            for results_file in self._results_files:
+                for athlete_id, event_name, value in iter_results(results_file):
+                    if event_name in stale:
+                        stale[event_name][athlete_id] = (
+                            value if timed_events[event_name] else -value)
+            for name, keys in stale.items():
+                rankings[name] = sorted((key, athlete_id)
+                                        for athlete_id, key in keys.items())
+        for ranking in rankings.values():
+            for place, (key, athlete_id) in _places(ranking):
+                if place > 3:
+                    break
+                self._results[athlete_countries[athlete_id]][place - 1] += 1
+
+    def get_results(self):
+        """Obtain the processed results for every country.
+
+        Return:
+            dict[str, list[int]]: Maps each country code to its number of gold,
+                                  silver and bronze medals and its number of
+                                  athletes.
+
+        Raises:
+            ValueError: If process has not yet been executed.
+        """
+        try:
+            return self._results
+        except Exception as exc:
+            raise ValueError("process has not yet been executed") from exc
+
+    def get_usage_ratio():
+        """Ratio of usage of the StreamCountryResults command against all
+           commands.
+
+        Return:
+            float: ratio of _stream_country_results_counter by
+                   _processing_counter.
+        """
+        return float(StreamCountryResults._stream_country_results_counter
+                     / StreamCountryResults._processing_counter)
+
+    def __str__(self):
+        return ""
+
+
+class ShardedResults(ProcessResults):
+    """Determine the places in every event and the results achieved by every
+       country and athlete, sharing the events between worker processes.
+
+    Events are assigned to shards by a stable hash of their name. The
+    results files are split into byte ranges, which the workers parse,
+    grouping the rows by shard. Each worker then places the events of one
+    shard from its rows in every range. The parent merges the placed results
+    of every shard.
+    """
+
+    _sharded_results_counter = 0
+
+    def __init__(self, athletes, countries, events,
+                 timed_events_results, scored_events_results, workers=None):
+        """
+        Parameters:
+            athletes (str) : Name of file containing athlete data.
+            countries (str): Name of file containing country data.
+            events (str)   : Name of file containing events data.
+            timed_events_results (str) : Name of file containing results for
+                                         timed events.
+            scored_events_results (str): Name of file containing results for
+                                         scored events.
+            workers (int): Number of worker processes and shards, defaults to
+                           the number of CPUs.
+        """
+        self._athletes = athletes
+        self._countries = countries
+        self._events = events
+        self._results_files = [timed_events_results, scored_events_results]
+        self._workers = workers or os.cpu_count() or 1
+
+    def process(self):
+        """
+        Place every event in its own shard, then count the gold, silver and
+        bronze medals won by each country and collect each athlete's results.
+        """
+        super().process()
+        ShardedResults._sharded_results_counter += 1
+        self._results, athlete_countries, timed_events = _read_games(
+            self._athletes, self._countries, self._events)
+        self._athlete_results = {}
+        ranges = [(results_file, start, end)
+                  for results_file in self._results_files
+                  for start, end in split_results(results_file, self._workers)]
+        with ProcessPoolExecutor(self._workers) as pool:
+            # Ranges are in file order, so that the last row of an athlete in
+            # an event is merged last.
+            grouped = [pool.submit(_read_shards, results_file, start, end,
+                                   timed_events, self._workers)
+                       for results_file, start, end in ranges]
+            grouped = [rows.result() for rows in grouped]
+            shards = [pool.submit(_place_shard, [rows[shard] for rows in grouped],
+                                  timed_events)
+                      for shard in range(self._workers)]
+            for shard in shards:
+                for event_name, placed in shard.result().items():
+                    for athlete_id, value, place in placed:
+                        self._athlete_results.setdefault(athlete_id, []).append(
+                            (event_name, value, place))
+                        if place <= 3:
+                            self._results[athlete_countries[athlete_id]][place - 1] += 1
+
+    def get_results(self):
+        """Obtain the processed results for every country.
+
+        Return:
+            dict[str, list[int]]: Maps each country code to its number of gold,
+                                  silver and bronze medals and its number of
+                                  athletes.
+
+        Raises:
+            ValueError: If process has not yet been executed.
+        """
+        try:
+            return self._results
+        except Exception as exc:
+            raise ValueError("process has not yet been executed") from exc
+
+    def get_athlete_results(self, athlete_id):
+        """Obtain the processed results for one athlete.
+
+        Parameters:
+            athlete_id (str): Identifier of the athlete.
+
+        Return:
+            list[tuple(str, float, int)]: Event name, value and place of each
+                                          of the athlete's results, ordered by
+                                          place then event name.
+
+        Raises:
+            ValueError: If process has not yet been executed.
+        """
+        try:
+            results = self._athlete_results.get(athlete_id, [])
+        except Exception as exc:
+            raise ValueError("process has not yet been executed") from exc
+        return sorted(results, key=lambda result: (result[2], result[0]))
+
+    def get_usage_ratio():
+        """Ratio of usage of the ShardedResults command against all commands.
+
+        Return:
+            float: ratio of _sharded_results_counter by _processing_counter.
+        """
+        return float(ShardedResults._sharded_results_counter
+                     / ShardedResults._processing_counter)
+
+    def __str__(self):
+        return ""
+
+
+class DetermineAllPlaces(ProcessResults):
+    """Process the results of every event, determining each athlete's place.
+
+    Gives the same places and rankings as a DeterminePlaces for each event,
+    but sorts the events as one batch, optionally in worker processes. Each
+    event placed is counted as a DeterminePlaces command, so usage ratios do
+    not depend on whether events were placed one at a time or in a batch.
+    """
+
+    _determine_all_places_counter = 0
+
+    def __init__(self, events=None, workers=None):
+        """
+        Parameters:
+            events (iterable[Event]): Events to place, defaults to every event
+                                      in all_events when processed.
+            workers (int): If given, the events are sorted by this many worker
+                           processes. Otherwise they are sorted in this process.
+        """
+        self._events = events
+        self._workers = workers
+
+    def process(self):
+        """
+        Rank the results of every event from best to worst and give the
+        appropriate result objects their places, as DeterminePlaces does.
+        """
+        super().process()
+        DetermineAllPlaces._determine_all_places_counter += 1
+        events = list(all_events.get_items() if self._events is None
+                      else self._events)
+        stores = [event.get_result_store() for event in events]
+        columns = ([store.values for store in stores],
+                   [[athlete.get_full_name() for athlete in store.athletes]
+                    for store in stores],
+                   [event.is_timed() for event in events])
+        if self._workers:
+            with ProcessPoolExecutor(self._workers) as pool:
+                chunksize = max(len(events) // (self._workers * 4), 1)
+                rankings = list(pool.map(_rank_values, *columns,
+                                         chunksize=chunksize))
+        else:
+            rankings = list(map(_rank_values, *columns))
+        self._results = {}
+        for event, store, (rows, places) in zip(events, stores, rankings):
+            self._results[event] = list(map(store.athletes.__getitem__, rows))
+            store.set_places(rows, places)
+        DeterminePlaces._determine_places_counter += len(events)
+        ProcessResults._processing_counter += len(events)
+
+    def get_results(self):
+        """Obtain the ranked athletes of every event.
+
+        Return:
+            dict[Event, list[Athlete]]: Maps each event to its athletes, from
+                                        best to worst result.
+
+        Raises:
+            ValueError: If process has not yet been executed.
+        """
+        try:
+            return self._results
+        except Exception as exc:
+            raise ValueError("process has not yet been executed") from exc
+
+    def get_usage_ratio():
+        """Ratio of usage of the DetermineAllPlaces command against all
+           commands.
+
+        Return:
+            float: ratio of _determine_all_places_counter by
+                   _processing_counter.
+        """
+        return float(DetermineAllPlaces._determine_all_places_counter
+                     / DetermineAllPlaces._processing_counter)
+
+    def __str__(self):
+        return ""
+
+
+class Standings(object):
+    """The ranked results of one event, kept in order as single results are
+       added, corrected or removed.
+
+    Each change finds the positions it affects by binary search and rewrites
+    only the places which change, rather than ranking the whole event again.
+    Places, including ties, are the same as DeterminePlaces gives. Once
+    created, every change to the event's results must be made through these
+    standings.
+    """
+
+    def __init__(self, event):
+        """Ranks every result of 'event' and sets their places.
+
+        Parameters:
+            event (Event): Event whose standings are kept.
+        """
+        self._event = event
+        self._store = event.get_result_store()
+        self._sign = 1 if event.is_timed() else -1
+        self._sequence = count()  # orders equal results with equal names
+        self._rows = {}
+        self._entries = {}
+        for row, athlete in enumerate(self._store.athletes):
+            self._rows[athlete] = row
+            self._entries[athlete] = self._entry(athlete, row)
+        # (key, full name, sequence, athlete) entries, best result first
+        self._ranked = sorted(self._entries.values())
+        self._update_places(0, float("inf"), set())
+
+    def _entry(self, athlete, row, sequence=None):
+        """(tuple) The ranked entry of the athlete's result in 'row'. The key
+           is the stored value, negated for scored events so that a lower key
+           is always a better result.
+        """
+        if sequence is None:
+            sequence = next(self._sequence)
+        return (self._sign * self._store.values[row], athlete.get_full_name(),
+                sequence, athlete)
+
+    def add_result(self, athlete, value):
+        """Sets the athlete's result in the event, adding it or correcting
+           their previous result, and updates the places which change.
+
+        Parameters:
+            athlete (Athlete): Athlete who achieved the result.
+            value (float): Time or score achieved.
+
+        Return:
+            set[Athlete]: Athletes whose place or medal changed, including
+                          'athlete' if their place changed.
+        """
+        event = self._event
+        ranked = self._ranked
+        start = len(ranked)
+        previous = self._entries.get(athlete)
+        if previous is not None:
+            start = bisect_left(ranked, previous)
+            del ranked[start]
+        row = self._rows.setdefault(athlete, len(self._store))
+        place = self._store.places[row] if previous is not None else 0
+        changed = set()
+        with batch_place_changes():
+            event.add_athlete(athlete)
+            athlete.add_event(event)
+            athlete.add_result(event, self._store.add(
+                athlete, value, athlete.results.get(event)))
+            # Keep the place, so that it is only reported if it changes.
+            self._store.set_place(row, place)
+            entry = self._entry(athlete, row,
+                                None if previous is None else previous[2])
+            self._entries[athlete] = entry
+            index = bisect_left(ranked, entry)
+            ranked.insert(index, entry)
+            self._update_places(min(start, index), entry[0] if previous is None
+                                else max(entry[0], previous[0]), changed)
+        return changed
+
+    def remove_result(self, athlete):
+        """Removes the athlete's result from the event, so that they no longer
+           compete in it, and updates the places which change.
+
+        Parameters:
+            athlete (Athlete): Athlete whose result is removed.
+
+        Return:
+            set[Athlete]: Athletes whose place or medal changed, including
+                          'athlete'.
+
+        Raises:
+            KeyError: If the athlete has no result in the event.
+        """
+        entry = self._entries.pop(athlete)
+        index = bisect_left(self._ranked, entry)
+        del self._ranked[index]
+        row = self._rows.pop(athlete)
+        changed = {athlete}
+        with batch_place_changes():
+            athlete.remove_result(self._event)
+            if row < len(self._store):
+                self._rows[self._store.athletes[row]] = row
+            self._update_places(index, entry[0], changed)
+        return changed
+
+    def _update_places(self, start, last_key, changed):
+        """Rewrites the places of the ranked entries from 'start' which differ
+           from their stored places. Stops at the first tie group worse than
+           'last_key' whose place is unchanged, as every worse result was
+           moved by the same number of places.
+
+        Parameters:
+            start (int): First entry whose place may have changed.
+            last_key (float): Worst key which was added or removed.
+            changed (set[Athlete]): Athletes whose place is rewritten are
+                                    added to this set.
+        """
+        ranked = self._ranked
+        places = self._store.places
+        rows = self._rows
+        previous_key = None
+        place = 0
+        changed_rows = []
+        changed_places = []
+        if start > 0:
+            previous_key = ranked[start - 1][0]
+            place = places[rows[ranked[start - 1][3]]]
+        for index in range(start, len(ranked)):
+            key, _, _, athlete = ranked[index]
+            row = rows[athlete]
+            if key != previous_key:
+                previous_key = key
+                place = index + 1
+                if key > last_key and places[row] == place:
+                    break
+            if places[row] != place:
+                changed_rows.append(row)
+                changed_places.append(place)
+                changed.add(athlete)
+        self._store.set_places(changed_rows, changed_places)
+
+    def get_results(self):
+        """(list[Athlete]) The event's athletes, from best to worst result."""
+        return [entry[3] for entry in self._ranked]
+
+
+class MedalTable(ProcessResults):
+    """Determine the results achieved by every country, scanning the placed
+       results of every event once.
+
+    Gives the same counts as a CountryResults for each country, ranked by
+    gold, then silver, then bronze medals, most first, then by country name.
+    """
+
+    _medal_table_counter = 0
+
+    def __init__(self, countries=None, events=None):
+        """
+        Parameters:
+            countries (iterable[Country]): Countries in the table, defaults to
+                                           every country in all_countries when
+                                           processed.
+            events (iterable[Event]): Events whose medals are counted, defaults
+                                      to every event in all_events when
+                                      processed.
+        """
+        self._countries = countries
+        self._events = events
+
+    def process(self):
+        """
+        Count the gold, silver and bronze medals won by each country and the
+        number of athletes who competed for each country, then rank them.
+
+        Raises:
+            RuntimeError: If places have not been determined in every event.
+        """
+        super().process()
+        MedalTable._medal_table_counter += 1
+        countries = (all_countries.get_items() if self._countries is None
+                     else self._countries)
+        events = (all_events.get_items() if self._events is None
+                  else self._events)
+        stores = [event.get_result_store() for event in events]
+        for store in stores:
+            if 0 in store.places:
+                raise RuntimeError("Places not yet determined")
+        counts = _count_medals(countries, stores)
+        for country, country_counts in counts.items():
+            country_counts.append(len(country.get_athletes()))
+        self._results = _rank_countries(counts.items())
+
+    def get_results(self):
+        """Obtain the medal table.
+
+        Return:
+            list[tuple(Country, list[int])]: Each country with its number of
+                                             gold, silver and bronze medals
+                                             and its number of athletes, from
+                                             first to last in the table.
+
+        Raises:
+            ValueError: If process has not yet been executed.
+        """
+        try:
+            return self._results
+        except Exception as exc:
+            raise ValueError("process has not yet been executed") from exc
+
+    def get_usage_ratio():
+        """Ratio of usage of the MedalTable command against all commands.
+
+        Return:
+            float: ratio of _medal_table_counter by _processing_counter.
+        """
+        return float(MedalTable._medal_table_counter
+                     / MedalTable._processing_counter)
+
+    def __str__(self):
+        return ""
+
+
+class LiveMedalTable(ProcessResults):
+    """The medal table of every country, kept up to date as places change.
+
+    Processing counts the medals once, as MedalTable does, then observes the
+    place changes of every result, moving each medal won or lost in O(1).
+    No place can change while the medals are counted, so no change is missed
+    or counted twice. The table is read under a lock, so it never shows a
+    batch of changes, such as the places set by one DeterminePlaces, partly
+    applied.
+    """
+
+    _live_medal_table_counter = 0
+
+    def __init__(self, countries=None, events=None):
+        """
+        Parameters:
+            countries (iterable[Country]): Countries in the table, defaults to
+                                           every country in all_countries when
+                                           processed.
+            events (iterable[Event]): Events whose medals are counted, defaults
+                                      to every event.
+        """
+        self._countries = countries
+        self._events = events
+        self._lock = threading.Lock()
+        self._observing = False
+
+    def process(self):
+        """
+        Count the gold, silver and bronze medals won by each country, then
+        follow the changes to places.
+        """
+        super().process()
+        LiveMedalTable._live_medal_table_counter += 1
+        countries = list(all_countries.get_items() if self._countries is None
+                         else self._countries)
+        self.close()
+
+        def count_medals():
+            if self._events is None:
+                stores = [event.get_result_store()
+                          for event in all_events.get_items()]
+                self._stores = None  # follow every event
+            else:
+                stores = [event.get_result_store() for event in self._events]
+                self._stores = set(stores)
+            counts = _count_medals(countries, stores)
+            with self._lock:
+                self._counts = counts
+
+        add_place_observer(self._places_changed, count_medals)
+        self._observing = True
+
+    def _places_changed(self, changes):
+        """Moves the medals won or lost in 'changes', a list of (store,
+           athlete, old_place, new_place) tuples, between the countries'
+           counts.
+        """
+        stores = self._stores
+        with self._lock:
+            counts = self._counts
+            for store, athlete, old_place, new_place in changes:
+                if stores is not None and store not in stores:
+                    continue
+                country_counts = counts.get(athlete.country)
+                if country_counts is not None:
+                    if 0 < old_place <= 3:
+                        country_counts[old_place - 1] -= 1
+                    if 0 < new_place <= 3:
+                        country_counts[new_place - 1] += 1
+
+    def close(self):
+        """Stops following the changes to places. The table keeps the counts
+           it had when closed.
+        """
+        if self._observing:
+            remove_place_observer(self._places_changed)
+            self._observing = False
+
+    def get_results(self):
+        """Obtain the current medal table.
+
+        Return:
+            list[tuple(Country, list[int])]: Each country with its number of
+                                             gold, silver and bronze medals
+                                             and its number of athletes, from
+                                             first to last in the table.
+
+        Raises:
+            ValueError: If process has not yet been executed.
+        """
+        try:
+            with self._lock:
+                counts = [(country, country_counts[:])
+                          for country, country_counts in self._counts.items()]
+        except Exception as exc:
+            raise ValueError("process has not yet been executed") from exc
+        for country, country_counts in counts:
+            country_counts.append(len(country.get_athletes()))
+        return _rank_countries(counts)
+
+    def get_usage_ratio():
+        """Ratio of usage of the LiveMedalTable command against all commands.
+
+        Return:
+            float: ratio of _live_medal_table_counter by _processing_counter.
+        """
+        return float(LiveMedalTable._live_medal_table_counter
+                     / LiveMedalTable._processing_counter)
+
+    def __str__(self):
+        return ""
+
+
+def _count_medals(countries, stores):
+    """Counts the medals won by each country in the results 'stores', reading
+       each place once. Undetermined places are skipped.
+
+    Parameters:
+        countries (iterable[Country]): Countries whose medals are counted.
+        stores (iterable[ResultStore]): Results of the events.
+
+    Return:
+        dict[Country, list[int]]: Maps each country to its number of gold,
+                                  silver and bronze medals.
+    """
+    counts = {country: [0, 0, 0] for country in countries}
+    for store in stores:
+        athletes = store.athletes
+        for row, place in enumerate(store.places):
+            if place <= 3 and place:
+                country_counts = counts.get(athletes[row].country)
+                if country_counts is not None:
+                    country_counts[place - 1] += 1
+    return counts
+
+
+def _rank_countries(counts):
+    """Ranks (country, counts) pairs by gold, then silver, then bronze
+       medals, most first, then by country name.
+
+    Return:
+        list[tuple(Country, list[int])]: The pairs, from first to last.
+    """
+    ranked = sorted(counts, key=lambda item: item[0].get_name())
+    ranked.sort(key=lambda item: item[1][:3], reverse=True)
+    return ranked
+
+
+class _Contenders(object):
+    """The best results of one event, keeping only the last result of each
+       athlete.
+
+    Results worse than the _KEEP best are dropped. 'floor' is the best key
+    ever dropped, so every result not kept is no better than it. The kept
+    ranking gives the medals exactly while at least three kept results are
+    better than 'floor'. That stays true unless several kept results are
+    replaced by worse ones.
+    """
+
+    __slots__ = ("ranked", "keys", "floor")
+
+    _KEEP = 8  # results kept, besides those tied with the last of them
+
+    def __init__(self):
+        self.ranked = []  # (key, athlete_id) pairs, best first
+        self.keys = {}  # athlete_id to key of each pair in ranked
+        self.floor = float("inf")
+
+    def add(self, key, athlete_id):
+        """Sets the athlete's result, replacing their previous one.
+
+        Parameters:
+            key (float): Result value, negated for scored events so that a
+                         lower key is always a better result.
+            athlete_id (str): Identifier of the athlete who achieved it.
+        """
+        ranked = self.ranked
+        keep = self._KEEP
+        previous = self.keys.pop(athlete_id, None)
+        if previous is not None:
+            ranked.remove((previous, athlete_id))
+        elif len(ranked) >= keep and key > ranked[keep - 1][0]:
+            self.floor = min(self.floor, key)
+            return
+        insort(ranked, (key, athlete_id))
+        self.keys[athlete_id] = key
+        if len(ranked) > keep:
+            cutoff = ranked[keep - 1][0]
+            while ranked[-1][0] > cutoff:
+                dropped, dropped_id = ranked.pop()
+                del self.keys[dropped_id]
+                self.floor = min(self.floor, dropped)
+
+    def is_exact(self):
+        """(bool) True if the kept results give every medal in the event."""
+        return (self.floor == float("inf")
+                or bisect_left(self.ranked, (self.floor,)) >= 3)
+
+
+def _read_games(athletes, countries, events):
+    """Reads the athletes, countries and events data files.
+
+    Parameters:
+        athletes (str) : Name of file containing athlete data.
+        countries (str): Name of file containing country data.
+        events (str)   : Name of file containing events data.
+
+    Return:
+        tuple(dict, dict, dict): Maps each country code to its number of gold,
+                                 silver and bronze medals (all 0) and athletes,
+                                 maps each athlete's identifier to their
+                                 country code and maps each event name to True
+                                 if the event is timed.
+    """
+    country_results = {}
+    for code, name in iter_rows(countries):
+        country_results[code] = [0, 0, 0, 0]
+    athlete_countries = {}
+    for identifier, first_name, surname, code in iter_rows(athletes):
+        athlete_countries[identifier] = sys.intern(code)
+        country_results[code][3] += 1
+    timed_events = {}
+    for name, timed in iter_rows(events):
+        timed_events[name] = timed == "TIMED"
+    return country_results, athlete_countries, timed_events
+
+
+def _rank_rows(store, lower_is_better):
+    """Ranks the rows of an event's ResultStore from best to worst result,
+       equal results being ordered by athlete's full name.
+
+    Parameters:
+        store (ResultStore): Results of the event.
+        lower_is_better (bool): True for timed events, False for scored.
+
+    Return:
+        tuple(list[int], list[int]): As returned by _rank_values.
+    """
+    return _rank_values(store.values, [athlete.get_full_name()
+                                       for athlete in store.athletes],
+                        lower_is_better)
+
+
+def _rank_values(values, names, lower_is_better):
+    """Ranks the rows of an event's results columns from best to worst value,
+       equal values being ordered by name.
+
+    The composite (value, name) order comes from two stable sorts, by name
+    then by value, which is faster in CPython than one sort on (value, name)
+    tuples. Places are then assigned in a single pass.
+
+    Parameters:
+        values (array): Time or score of each row.
+        names (list[str]): Athlete's full name of each row.
+        lower_is_better (bool): True for timed events, False for scored.
+
+    Return:
+        tuple(list[int], list[int]): The rows in ranked order and the place of
+                                     each, tied rows sharing the place of the
+                                     first of them (e.g. 1, 2, 2, 4).
+    """
+    rows = sorted(range(len(values)), key=names.__getitem__)
+    rows.sort(key=values.__getitem__, reverse=not lower_is_better)
+    places = []
+    place = 0
+    previous_value = None
+    for position, value in enumerate(map(values.__getitem__, rows), 1):
+        if value != previous_value:
+            place = position
+            previous_value = value
+        places.append(place)
+    return rows, places
+
+
+def _places(ranked):
+    """Yields the place of each entry in a ranking, tied entries sharing the
+       place of the first of them (e.g. 1, 2, 2, 4).
+
+    Parameters:
+        ranked (list[tuple]): Entries sorted from best to worst, each starting
+                              with the key they were sorted by.
+
+    Yield:
+        tuple(int, tuple): The place and the entry.
+    """
+    place = 0
+    previous_key = None
+    for position, entry in enumerate(ranked):
+        if position == 0 or entry[0] != previous_key:
+            place = position + 1
+            previous_key = entry[0]
+        yield place, entry
+
+
+def _shard_of(event_name, shards):
+    """(int) Shard of the named event, stable across processes."""
+    return zlib.crc32(event_name.encode()) % shards
+
+
+def _read_shards(results_file, start, end, timed_events, shards):
+    """Parses one byte range of a results file, grouping its rows by shard.
+
+    Runs in a worker process for ShardedResults.
+
+    Parameters:
+        results_file (str): Name of the results file.
+        start (int): Offset of the range's first row.
+        end (int): Offset after the range's last row.
+        timed_events (dict[str, bool]): Whether each event is timed.
+        shards (int): Number of shards.
+
+    Return:
+        list[dict[str, dict[str, float]]]: For each shard, maps each event
+            name to the last value of each athlete in the range.
+    """
+    event_values = {name: {} for name in timed_events}
+    for athlete_id, event_name, value in iter_results_range(results_file,
+                                                            start, end):
+        # The last row of an athlete in an event wins, as in load_data.
+        event_values[event_name][athlete_id] = value
+    grouped = [{} for shard in range(shards)]
+    for event_name, values in event_values.items():
+        if values:
+            grouped[_shard_of(event_name, shards)][event_name] = values
+    return grouped
+
+
+def _place_shard(grouped, timed_events):
+    """Places the results of every event in one shard.
+
+    Runs in a worker process for ShardedResults.
+
+    Parameters:
+        grouped (list[dict[str, dict[str, float]]]): The shard's rows from
+            each byte range, as returned by _read_shards, in file order.
+        timed_events (dict[str, bool]): Whether each event is timed.
+
+    Return:
+        dict[str, list[tuple(str, float, int)]]: Maps each event name in the
+            shard to the athlete identifier, value and place of its results.
+    """
+    event_values = {}
+    for rows in grouped:
+        for event_name, values in rows.items():
+            event_values.setdefault(event_name, {}).update(values)
+    placed = {}
+    for event_name, values in event_values.items():
+        sign = 1 if timed_events[event_name] else -1
+        ranking = sorted((sign * value, athlete_id, value)
+                         for athlete_id, value in values.items())
+        placed[event_name] = [(athlete_id, value, place) for place, (_, athlete_id, value)
+                              in _places(ranking)]
+    return placed
+
 
 def demo_entities():
     """Simple test code to demonstrate using the entity classes.
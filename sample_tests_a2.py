@@ -27,7 +27,11 @@ Do not take this as a perfect example of code for this course.
 
 from testrunner import *
 
+import gc
 import os
+import threading
+import tracemalloc
+import weakref
 
 import entities
 import processing
@@ -67,6 +71,15 @@ def setUpTestFiles1():
             "1,Men's Moguls,73.96\n2,Men's Moguls,82.57\n3,Men's Moguls,15.11\n4,Men's Moguls,75.98\n5,Women's Moguls,68.19\n6,Women's Moguls,75.35\n7,Women's Moguls,75.08\n8,Women's Moguls,68.68\n10,Men's Aerials,61.95\n11,Women's Aerials,44.69\n12,Women's Aerials,55.34\n13,Women's Aerials,47.01\n14,Women's Aerials,34.28\n15,Men's Half-Pipe,92\n16,Men's Half-Pipe,62\n17,Men's Half-Pipe,62.25\n18,Women's Half-Pipe,48.25\n19,Women's Half-Pipe,57.5\n20,Men's Slopestyle,1\n22,Men's Aerials,86.28\n23,Men's Aerials,98.11\n24,Women's Aerials,52.24\n25,Men's Moguls,77.02\n26,Men's Moguls,86.63\n27,Men's Moguls,12.22\n28,Women's Moguls,70.98\n29,Women's Moguls,78.56\n30,Women's Moguls,13.33\n31,Women's Moguls,74.89\n38,Men's Half-Pipe,71.25\n39,Women's Half-Pipe,36.75\n40,Women's Half-Pipe,23.25\n41,Women's Half-Pipe,50\n42,Men's Slopestyle,86\n43,Men's Slopestyle,85.2\n44,Men's Slopestyle,76.41\n45,Men's Slopestyle,61.08\n46,Women's Slopestyle,76.33\n47,Women's Slopestyle,36.61\n48,Women's Slopestyle,36.45\n66,Men's Slopestyle,87.16\n67,Men's Half-Pipe,97.75\n68,Men's Half-Pipe,95.25\n69,Women's Half-Pipe,98.25\n70,Women's Half-Pipe,89.75\n71,Women's Half-Pipe,85.75\n76,Women's Moguls,78.65\n77,Women's Moguls,77.4\n78,Men's Moguls,82.19\n79,Women's Slopestyle,83\n80,Women's Slopestyle,75.38\n")
 
 
+def setUpCorrectedResults():
+    """ Writes the timed results with a duplicated row and corrected rows appended """
+    with open("timed_event_results.test") as timedFile:
+        rows = timedFile.read()
+    with open("corrected_results.test", "w") as correctedFile:
+        correctedFile.write(rows + "73,Men's Luge,190.702\n72,Men's Luge,250.0\n"
+                            "9,Men's Luge,195.0\n55,Women's Speedskating 500m,43.0\n")
+
+
 def tearDownTestFiles():
     os.remove("countries.test")
     os.remove("athletes.test")
@@ -74,6 +87,23 @@ def tearDownTestFiles():
     os.remove("scored_event_results.test")
     os.remove("timed_event_results.test")
 
+def resetCollections():
+    for collection in (entities.all_athletes, entities.all_countries, entities.all_events):
+        collection.clear()
+
+
+def describeCollections():
+    """ Summarise the loaded entities and their relationships for comparison """
+    summary = []
+    for athlete in entities.all_athletes.get_items():
+        summary.append((athlete.get_id(), athlete.get_full_name(), str(athlete.get_country()),
+                        [(str(event), athlete.get_result(event).get_result()) for event in athlete.get_events()]))
+    for event in entities.all_events.get_items():
+        summary.append((event.get_name(), event.is_timed(), [athlete.get_id() for athlete in event.get_athletes()]))
+    for country in entities.all_countries.get_items():
+        summary.append((str(country), [athlete.get_id() for athlete in country.get_athletes()]))
+    return summary
+
 class A2TestClass(OrderedTestCase):
     """Base class for a2 tests"""
 
@@ -566,6 +596,1159 @@ class LoadDataTests(A2TestClass):
                                                            athlete50.get_result(entities.all_events.find_item("Men's Speedskating 1000m"))])
 
 
+class StreamCountryResultsTests(A2TestClass):
+    """ Tests the StreamCountryResults class"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 9
+        super(StreamCountryResultsTests, cls).setUpClass()
+        setUpTestFiles1()
+
+    @classmethod
+    def tearDownClass(cls):
+        tearDownTestFiles()
+
+    def testGetResults(self):
+        """ test get_results"""
+        streamResults = processing.StreamCountryResults("athletes.test", "countries.test", "events.test",
+                                                        "timed_event_results.test", "scored_event_results.test")
+        with self.assertRaises(ValueError):
+            streamResults.get_results()
+
+    def testProcessing(self):
+        """ test streamed results match loaded results"""
+        streamResults = processing.StreamCountryResults("athletes.test", "countries.test", "events.test",
+                                                        "timed_event_results.test", "scored_event_results.test")
+        streamResults.process()
+        results = streamResults.get_results()
+        self.assertEqual(results["GER"], [1, 1, 1, 3])
+        for country in entities.all_countries.get_items():
+            countryProcessing = processing.CountryResults(country)
+            countryProcessing.process()
+            self.assertEqual(results[country.get_country_code()], countryProcessing.get_results())
+
+    def testRepeatedRows(self):
+        """ test the last row of an athlete in an event replaces earlier rows"""
+        setUpCorrectedResults()
+        try:
+            files = ("athletes.test", "countries.test", "events.test",
+                     "corrected_results.test", "scored_event_results.test")
+            streamResults = processing.StreamCountryResults(*files)
+            streamResults.process()
+            results = streamResults.get_results()
+            # keeping only the top three forces Men's Luge to be read again
+            processing._Contenders._KEEP = 3
+            try:
+                streamResults.process()
+                self.assertEqual(streamResults.get_results(), results)
+            finally:
+                processing._Contenders._KEEP = 8
+            resetCollections()
+            entities.load_data(*files)
+            processing.DetermineAllPlaces().process()
+            self.assertEqual(results["AUT"], [1, 0, 0, 1])
+            for country in entities.all_countries.get_items():
+                countryProcessing = processing.CountryResults(country)
+                countryProcessing.process()
+                self.assertEqual(results[country.get_country_code()], countryProcessing.get_results())
+        finally:
+            os.remove("corrected_results.test")
+            resetCollections()
+
+
+class SnapshotTests(A2TestClass):
+    """ Tests loading data through a snapshot"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 10
+        super(SnapshotTests, cls).setUpClass()
+        setUpTestFiles1()
+
+    @classmethod
+    def tearDownClass(cls):
+        tearDownTestFiles()
+        os.remove("games.snapshot")
+
+    def _load(self):
+        resetCollections()
+        entities.load_data("athletes.test", "countries.test", "events.test",
+                           "timed_event_results.test", "scored_event_results.test", snapshot="games.snapshot")
+        return describeCollections()
+
+    def testRestore(self):
+        """ test restoring a snapshot gives the same entities"""
+        loaded = self._load()
+        self.assertTrue(os.path.exists("games.snapshot"))
+        self.assertEqual(self._load(), loaded)
+
+    def testStaleOrCorrupt(self):
+        """ test stale or corrupt snapshots are replaced"""
+        loaded = self._load()
+        with open("games.snapshot", "wb") as snapshotFile:
+            snapshotFile.write(b"not a snapshot")
+        self.assertEqual(self._load(), loaded)
+        with open("events.test", "a") as eventFile:
+            eventFile.write("Men's Curling,SCORED\n")
+        self.assertEqual(len(self._load()), len(loaded) + 1)
+
+    def testPickleNotLoaded(self):
+        """ test a pickle in place of the snapshot is not unpickled"""
+        import pickle
+
+        class Payload(object):
+            def __reduce__(self):
+                return (os.mkdir, ("pickle_payload.test",))
+
+        loaded = self._load()
+        with open("games.snapshot", "wb") as snapshotFile:
+            pickle.dump(Payload(), snapshotFile)
+        try:
+            self.assertEqual(self._load(), loaded)
+            self.assertFalse(os.path.exists("pickle_payload.test"))
+        finally:
+            if os.path.exists("pickle_payload.test"):
+                os.rmdir("pickle_payload.test")
+
+    def testTruncated(self):
+        """ test a snapshot cut short is replaced"""
+        loaded = self._load()
+        with open("games.snapshot", "rb") as snapshotFile:
+            data = snapshotFile.read()
+        with open("games.snapshot", "wb") as snapshotFile:
+            snapshotFile.write(data[:-8])
+        self.assertEqual(self._load(), loaded)
+        with open("games.snapshot", "rb") as snapshotFile:
+            self.assertEqual(snapshotFile.read(), data)
+
+
+class ResultsFeedTests(A2TestClass):
+    """ Tests the ResultsFeed class"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 11
+        super(ResultsFeedTests, cls).setUpClass()
+        setUpTestFiles1()
+
+    @classmethod
+    def tearDownClass(cls):
+        tearDownTestFiles()
+
+    def testUpdate(self):
+        """ test appended results are applied once"""
+        resetCollections()
+        entities.load_data("athletes.test", "countries.test", "events.test",
+                           "timed_event_results.test", "scored_event_results.test")
+        feed = entities.ResultsFeed(["timed_event_results.test", "scored_event_results.test"], from_end=True)
+        self.assertEqual(feed.update(), set())
+        with open("timed_event_results.test", "a") as timedFile:
+            timedFile.write("62,Men's Speedskating 5000m,368.5\n63,Men's Luge,19")
+        event = entities.all_events.find_item("Men's Speedskating 5000m")
+        self.assertEqual(feed.update(), {event})
+        processing.DeterminePlaces(event).process()
+        self.assertEqual(entities.all_athletes.find_item("62").get_result(event).get_place(), "1")
+        self.assertEqual(entities.all_athletes.find_item("60").get_result(event).get_place(), "2")
+        with open("timed_event_results.test", "a") as timedFile:
+            timedFile.write("0.5\n")
+        self.assertEqual(feed.update(), {entities.all_events.find_item("Men's Luge")})
+        self.assertEqual(entities.all_athletes.find_item("63").get_result(
+            entities.all_events.find_item("Men's Luge")).get_result(), "190.5")
+
+
+class ManagedDictionaryTests(A2TestClass):
+    """ Tests the ManagedDictionary class"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 12
+        super(ManagedDictionaryTests, cls).setUpClass()
+
+    def testBulk(self):
+        """ test add_items, find_items, len, in and iteration"""
+        collection = entities.ManagedDictionary()
+        collection.add_items([("CAN", "Canada"), ("AUS", "Australia")])
+        self.assertEqual(len(collection), 2)
+        self.assertTrue("CAN" in collection)
+        self.assertFalse("NOR" in collection)
+        self.assertEqual(list(collection), ["CAN", "AUS"])
+        self.assertTrue(all(key in collection for key in collection))
+        self.assertEqual(list(collection.view_items()), ["Canada", "Australia"])
+        self.assertEqual(collection.find_items(["AUS", "CAN"]), ["Australia", "Canada"])
+        with self.assertRaises(KeyError):
+            collection.find_items(["AUS", "NOR"])
+        self.assertEqual(collection.find_items(["NOR", "CAN"], missing="skip"), ["Canada"])
+        self.assertEqual(collection.find_items(["NOR", "CAN"], missing="default"), [None, "Canada"])
+
+
+class NumpyLoadTests(A2TestClass):
+    """ Tests loading results through NumPy arrays"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 13
+        super(NumpyLoadTests, cls).setUpClass()
+        setUpTestFiles1()
+
+    @classmethod
+    def tearDownClass(cls):
+        tearDownTestFiles()
+
+    def testLoadData(self):
+        """ test load_data with use_numpy gives the same entities"""
+        if entities.numpy is None:
+            self.skipTest("NumPy is not installed")
+        files = ("athletes.test", "countries.test", "events.test",
+                 "timed_event_results.test", "scored_event_results.test")
+        resetCollections()
+        entities.load_data(*files)
+        loaded = describeCollections()
+        resetCollections()
+        entities.load_data(*files, use_numpy=True)
+        self.assertEqual(describeCollections(), loaded)
+
+    def testRepeatedRows(self):
+        """ test use_numpy keeps the last row of an athlete in an event"""
+        if entities.numpy is None:
+            self.skipTest("NumPy is not installed")
+        setUpCorrectedResults()
+        files = ("athletes.test", "countries.test", "events.test",
+                 "corrected_results.test", "scored_event_results.test")
+        placed = lambda: [[(athlete.get_id(), athlete.get_result(event).get_place())
+                           for athlete in event.get_athletes()]
+                          for event in entities.all_events.get_items()]
+        try:
+            for fixed_point in (None, 1000):
+                resetCollections()
+                entities.load_data(*files, fixed_point=fixed_point)
+                processing.DetermineAllPlaces().process()
+                loaded = describeCollections(), placed()
+                resetCollections()
+                entities.load_data(*files, use_numpy=True, fixed_point=fixed_point)
+                processing.DetermineAllPlaces().process()
+                self.assertEqual((describeCollections(), placed()), loaded)
+            # Events which already have results are linked row by row.
+            luge = entities.all_events.find_item("Men's Luge")
+            athlete = entities.all_athletes.find_item("72")
+            self.assertEqual(athlete.get_result(luge).get_value(), 250.0)
+            arrays = entities.read_result_arrays("timed_event_results.test")
+            entities._add_result_arrays(entities.default_dataset, arrays)
+            self.assertEqual(athlete.get_result(luge).get_value(), 190.728)
+            self.assertEqual(len(luge.get_athletes()), 7)
+        finally:
+            os.remove("corrected_results.test")
+
+
+class ShardedResultsTests(A2TestClass):
+    """ Tests the ShardedResults class"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 14
+        super(ShardedResultsTests, cls).setUpClass()
+        setUpTestFiles1()
+
+    @classmethod
+    def tearDownClass(cls):
+        tearDownTestFiles()
+
+    def testProcessing(self):
+        """ test sharded results match loaded results"""
+        files = ("athletes.test", "countries.test", "events.test",
+                 "timed_event_results.test", "scored_event_results.test")
+        resetCollections()
+        entities.load_data(*files)
+        for event in entities.all_events.get_items():
+            processing.DeterminePlaces(event).process()
+        shardedResults = processing.ShardedResults(*files, workers=3)
+        shardedResults.process()
+        for country in entities.all_countries.get_items():
+            countryProcessing = processing.CountryResults(country)
+            countryProcessing.process()
+            self.assertEqual(shardedResults.get_results()[country.get_country_code()],
+                             countryProcessing.get_results())
+        self.assertEqual(shardedResults.get_athlete_results("50"),
+                         [("Men's Speedskating 500m", 35.16, 3), ("Men's Speedskating 1000m", 70.03, 4)])
+
+    def testRepeatedRows(self):
+        """ test the last row of an athlete in an event replaces earlier rows"""
+        setUpCorrectedResults()
+        try:
+            files = ("athletes.test", "countries.test", "events.test",
+                     "corrected_results.test", "scored_event_results.test")
+            resetCollections()
+            entities.load_data(*files)
+            processing.DetermineAllPlaces().process()
+            shardedResults = processing.ShardedResults(*files, workers=3)
+            shardedResults.process()
+            self.assertEqual(shardedResults.get_results()["AUT"], [1, 0, 0, 1])
+            for country in entities.all_countries.get_items():
+                countryProcessing = processing.CountryResults(country)
+                countryProcessing.process()
+                self.assertEqual(shardedResults.get_results()[country.get_country_code()],
+                                 countryProcessing.get_results())
+            self.assertEqual(shardedResults.get_athlete_results("73"), [("Men's Luge", 190.702, 1)])
+            self.assertEqual(shardedResults.get_athlete_results("72"), [("Men's Luge", 250.0, 7)])
+        finally:
+            os.remove("corrected_results.test")
+            resetCollections()
+
+
+class LazyLoadTests(A2TestClass):
+    """ Tests lazily loading athletes and results"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 15
+        super(LazyLoadTests, cls).setUpClass()
+        setUpTestFiles1()
+
+    @classmethod
+    def tearDownClass(cls):
+        tearDownTestFiles()
+
+    def testLoadData(self):
+        """ test athletes are built on access and match an eager load"""
+        files = ("athletes.test", "countries.test", "events.test",
+                 "timed_event_results.test", "scored_event_results.test")
+        resetCollections()
+        entities.load_data(*files)
+        loaded = describeCollections()
+        resetCollections()
+        entities.load_data(*files, lazy=True)
+        athlete = entities.all_athletes.find_item("60")
+        self.assertIsInstance(athlete, entities.Athlete)
+        self.assertIsInstance(entities.all_athletes._items["61"], entities._Lazy)
+        self.assertEqual(entities.all_events.find_item("Men's Speedskating 5000m").get_athletes(),
+                         [entities.all_athletes.find_item("54"), athlete, entities.all_athletes.find_item("61")])
+        self.assertEqual(describeCollections(), loaded)
+
+    def testSnapshotRejected(self):
+        """ test lazy cannot be combined with a snapshot"""
+        files = ("athletes.test", "countries.test", "events.test",
+                 "timed_event_results.test", "scored_event_results.test")
+        resetCollections()
+        with self.assertRaises(ValueError):
+            entities.load_data(*files, lazy=True, snapshot="lazy.snapshot")
+        self.assertFalse(os.path.exists("lazy.snapshot"))
+        self.assertEqual(len(entities.all_athletes.get_items()), 0)
+
+
+class MembershipTests(A2TestClass):
+    """ Tests athletes and events are only registered once"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 16
+        super(MembershipTests, cls).setUpClass()
+
+    def testAddOnce(self):
+        """ test repeated adds keep the first registration order"""
+        country = entities.Country("Canada", "CAN")
+        athlete1 = entities.Athlete("1", "Jane", "Doe", country)
+        athlete2 = entities.Athlete("2", "John", "Doe", country)
+        event1 = entities.Event("Event 1", "TIMED", [athlete1, athlete2, athlete1])
+        event2 = entities.Event("Event 2", "SCORED", [])
+        self.assertEqual(event1.get_athletes(), [athlete1, athlete2])
+        event1.add_athletes([athlete2, athlete1])
+        event2.add_athlete(athlete2)
+        country.add_athletes([athlete1, athlete2, athlete1])
+        athlete1.add_events([event1, event1])
+        self.assertEqual(event1.get_athletes(), [athlete1, athlete2])
+        self.assertEqual(country.get_athletes(), [athlete1, athlete2])
+        self.assertEqual(athlete1.get_events(), [event1])
+        self.assertTrue(event1.has_athlete(athlete2))
+        self.assertFalse(event2.has_athlete(athlete1))
+        self.assertTrue(country.has_athlete(athlete1))
+        self.assertTrue(athlete1.has_event(event1))
+        self.assertFalse(athlete1.has_event(event2))
+
+    def testLazyMembership(self):
+        """ test built athletes replace their placeholders as members"""
+        setUpTestFiles1()
+        try:
+            resetCollections()
+            entities.load_data("athletes.test", "countries.test", "events.test",
+                               "timed_event_results.test", "scored_event_results.test",
+                               lazy=True)
+            athlete = entities.all_athletes.find_item("60")
+            event = entities.all_events.find_item("Men's Speedskating 5000m")
+            event.add_athlete(athlete)
+            self.assertEqual(event.get_athletes().count(athlete), 1)
+            self.assertTrue(event.has_athlete(athlete))
+            self.assertTrue(athlete.get_country().has_athlete(athlete))
+        finally:
+            tearDownTestFiles()
+
+
+class ReadOnlyViewTests(A2TestClass):
+    """ Tests read-only views of events and collections"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 17
+        super(ReadOnlyViewTests, cls).setUpClass()
+
+    def testEventView(self):
+        """ test an event's view matches get_athletes and cannot be changed"""
+        country = entities.Country("Canada", "CAN")
+        athlete1 = entities.Athlete("1", "Jane", "Doe", country)
+        athlete2 = entities.Athlete("2", "John", "Doe", country)
+        event = entities.Event("Event 1", "TIMED", [athlete1, athlete2])
+        view = event.view_athletes()
+        self.assertEqual(len(view), 2)
+        self.assertIs(view[1], athlete2)
+        self.assertEqual(list(view), event.get_athletes())
+        self.assertIn(athlete1, view)
+        with self.assertRaises(TypeError):
+            view[0] = athlete2
+        self.assertFalse(hasattr(view, "append"))
+
+    def testCollectionView(self):
+        """ test views of a collection are shared until it changes"""
+        collection = entities.ManagedDictionary()
+        collection.add_items([("a", 1), ("b", 2)])
+        view = collection.view_items()
+        self.assertEqual(view, [1, 2])
+        self.assertIs(collection.view_items()[0], view[0])
+        self.assertEqual(collection.view_items(), collection.view_items())
+        collection.add_item("c", 3)
+        self.assertEqual(view, [1, 2])
+        self.assertEqual(collection.view_items(), [1, 2, 3])
+        collection.clear()
+        self.assertEqual(len(collection.view_items()), 0)
+
+
+class ItemIdTests(A2TestClass):
+    """ Tests the dense integer IDs given to a collection's items"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 18
+        super(ItemIdTests, cls).setUpClass()
+
+    def testIds(self):
+        """ test IDs follow the order keys were first added"""
+        collection = entities.ManagedDictionary()
+        collection.add_items([("b", 1), ("a", 2)])
+        collection.add_item("c", 3)
+        collection.add_item("b", 4)
+        self.assertEqual([collection.get_id(key) for key in "abc"], [1, 0, 2])
+        self.assertEqual([collection.get_key(item_id) for item_id in range(3)],
+                         ["b", "a", "c"])
+        self.assertEqual([collection.find_item_by_id(item_id) for item_id in range(3)],
+                         collection.get_items())
+        with self.assertRaises(KeyError):
+            collection.get_id("d")
+        with self.assertRaises(IndexError):
+            collection.find_item_by_id(3)
+        with self.assertRaises(IndexError):
+            collection.get_key(-1)
+        collection.clear()
+        collection.add_item("d", 5)
+        self.assertEqual(collection.get_id("d"), 0)
+
+    def testLazyIds(self):
+        """ test finding an unbuilt athlete by ID builds it"""
+        setUpTestFiles1()
+        try:
+            resetCollections()
+            entities.load_data("athletes.test", "countries.test", "events.test",
+                               "timed_event_results.test", "scored_event_results.test",
+                               lazy=True)
+            athlete_id = entities.all_athletes.get_id("61")
+            athlete = entities.all_athletes.find_item_by_id(athlete_id)
+            self.assertIsInstance(athlete, entities.Athlete)
+            self.assertIs(entities.all_athletes.find_item("61"), athlete)
+        finally:
+            tearDownTestFiles()
+
+
+class NumericResultTests(A2TestClass):
+    """ Tests the numeric Result accessors and fixed point results"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 19
+        super(NumericResultTests, cls).setUpClass()
+
+    def testAccessors(self):
+        """ test get_value and get_place_number return numbers"""
+        result = entities.Result(10.5)
+        self.assertEqual(result.get_value(), 10.5)
+        with self.assertRaises(RuntimeError):
+            result.get_place_number()
+        result.set_place(2)
+        self.assertEqual(result.get_place_number(), 2)
+        self.assertEqual(result.get_medal(), "Silver")
+
+    def testFixedPoint(self):
+        """ test fixed point results tie exactly and read back unchanged"""
+        country = entities.Country("Canada", "CAN")
+        athlete1 = entities.Athlete("1", "Jane", "Doe", country)
+        athlete2 = entities.Athlete("2", "John", "Doe", country)
+        event = entities.Event("Event 1", "TIMED", [athlete1, athlete2])
+        athlete1.add_result(event, entities.Result(0.1 + 0.2))
+        athlete2.add_result(event, entities.Result(0.3))
+        processing.DeterminePlaces(event).process()
+        self.assertEqual([athlete1.get_result(event).get_place(),
+                          athlete2.get_result(event).get_place()], ["2", "1"])
+        event.set_fixed_point(1000)
+        processing.DeterminePlaces(event).process()
+        self.assertEqual([athlete1.get_result(event).get_place(),
+                          athlete2.get_result(event).get_place()], ["1", "1"])
+        self.assertEqual(athlete2.get_result(event).get_result(), "0.3")
+        athlete2.add_result(event, entities.Result(0.25))
+        self.assertEqual(athlete2.get_result(event).get_value(), 0.25)
+        event.set_fixed_point(None)
+        self.assertEqual(athlete2.get_result(event).get_value(), 0.25)
+        with self.assertRaises(ValueError):
+            event.set_fixed_point(0.5)
+
+    def testLoadData(self):
+        """ test loading fixed point results matches a float load"""
+        setUpTestFiles1()
+        try:
+            files = ("athletes.test", "countries.test", "events.test",
+                     "timed_event_results.test", "scored_event_results.test")
+            resetCollections()
+            entities.load_data(*files)
+            loaded = describeCollections()
+            resetCollections()
+            entities.load_data(*files, fixed_point=1000)
+            self.assertEqual(describeCollections(), loaded)
+            with self.assertRaises(ValueError):
+                entities.load_data(*files, fixed_point=-1)
+        finally:
+            tearDownTestFiles()
+
+
+class BulkLoadTests(A2TestClass):
+    """ Tests loading with the garbage collector suspended"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 20
+        super(BulkLoadTests, cls).setUpClass()
+        setUpTestFiles1()
+
+    @classmethod
+    def tearDownClass(cls):
+        tearDownTestFiles()
+
+    def testLoadData(self):
+        """ test a bulk load matches a normal load and reports its collections"""
+        files = ("athletes.test", "countries.test", "events.test",
+                 "timed_event_results.test", "scored_event_results.test")
+        resetCollections()
+        entities.load_data(*files)
+        loaded = describeCollections()
+        stats = entities.get_load_stats()
+        self.assertEqual(sorted(stats), ["collected", "collections", "elapsed", "gc_pause"])
+        resetCollections()
+        enabled = gc.isenabled()
+        try:
+            entities.load_data(*files, bulk=True)
+            self.assertEqual(gc.isenabled(), enabled)
+            self.assertGreater(gc.get_freeze_count(), 0)
+            self.assertEqual(entities.get_load_stats()["collections"], (0, 0, 0))
+            self.assertEqual(describeCollections(), loaded)
+        finally:
+            entities.default_dataset.clear()
+        self.assertEqual(gc.get_freeze_count(), 0)
+
+    def testClearReleases(self):
+        """ test clearing a bulk loaded dataset lets its entities be collected"""
+        files = ("athletes.test", "countries.test", "events.test",
+                 "timed_event_results.test", "scored_event_results.test")
+        games = entities.Dataset()
+        sizes = []
+        tracemalloc.start()
+        try:
+            for load in range(6):
+                games.load_data(*files, bulk=True)
+                games.clear()
+                gc.collect()
+                sizes.append(tracemalloc.get_traced_memory()[0])
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(gc.get_freeze_count(), 0)
+        # one load allocates around 90 KB, which must not be kept
+        self.assertLess(sizes[-1] - sizes[0], 20000)
+
+    def testSeveralDatasets(self):
+        """ test bulk loads wait for each other and clearing one dataset keeps the others frozen"""
+        files = ("athletes.test", "countries.test", "events.test",
+                 "timed_event_results.test", "scored_event_results.test")
+        first = entities.Dataset()
+        second = entities.Dataset()
+        enabled = gc.isenabled()
+        try:
+            first.load_data(*files, bulk=True)
+            with entities._bulk_lock:
+                loader = threading.Thread(target=second.load_data, args=files,
+                                          kwargs={"bulk": True})
+                loader.start()
+                loader.join(0.1)
+                self.assertTrue(loader.is_alive())
+                self.assertEqual(len(second.athletes), 0)
+            loader.join()
+            self.assertEqual(gc.isenabled(), enabled)
+            self.assertEqual(len(second.athletes), len(first.athletes))
+            first.clear()
+            self.assertGreater(gc.get_freeze_count(), 0)
+            second.load_data(*files, bulk=True)
+            second.clear()
+            self.assertEqual(gc.get_freeze_count(), 0)
+        finally:
+            first.clear()
+            second.clear()
+        self.assertEqual(gc.get_freeze_count(), 0)
+
+
+class IndexTests(A2TestClass):
+    """ Tests secondary indexes of the collections"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 21
+        super(IndexTests, cls).setUpClass()
+        setUpTestFiles1()
+
+    @classmethod
+    def tearDownClass(cls):
+        for collection in (entities.all_athletes, entities.all_countries, entities.all_events):
+            collection._indexes.clear()
+        tearDownTestFiles()
+
+    def testIndex(self):
+        """ test an index follows added and overwritten items"""
+        collection = entities.ManagedDictionary()
+        collection.add_items([("a", 1), ("b", 2)])
+        collection.add_index("parity", lambda item: item % 2)
+        collection.add_item("c", 3)
+        self.assertEqual(collection.find_by_index("parity", 1), [1, 3])
+        collection.add_item("a", 4)
+        self.assertEqual(collection.find_by_index("parity", 1), [3])
+        self.assertEqual(collection.find_by_index("parity", 0), [2, 4])
+        self.assertEqual(collection.find_by_index("parity", 2), [])
+        with self.assertRaises(ValueError):
+            collection.find_by_index("size", 1)
+        collection.clear()
+        self.assertEqual(collection.find_by_index("parity", 0), [])
+
+    def testStandardIndexes(self):
+        """ test the standard indexes match a scan, for eager and lazy loads"""
+        files = ("athletes.test", "countries.test", "events.test",
+                 "timed_event_results.test", "scored_event_results.test")
+        entities.add_standard_indexes()
+        for lazy in (False, True):
+            resetCollections()
+            entities.load_data(*files, lazy=lazy)
+            athlete = entities.all_athletes.find_item("60")
+            self.assertEqual(entities.all_events.find_by_index("timed", True),
+                             [event for event in entities.all_events.get_items() if event.is_timed()])
+            self.assertEqual(entities.all_athletes.find_by_index("country", athlete.get_country().get_country_code()),
+                             athlete.get_country().get_athletes())
+            self.assertIn(athlete, entities.all_athletes.find_by_index("surname", athlete.surname.lower()))
+
+
+class DatasetTests(A2TestClass):
+    """ Tests keeping several datasets loaded at once"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 22
+        super(DatasetTests, cls).setUpClass()
+        setUpTestFiles1()
+        open("empty_results.test", "w").close()
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove("empty_results.test")
+        tearDownTestFiles()
+
+    def testDatasets(self):
+        """ test datasets are loaded independently of each other and the globals"""
+        files = ("athletes.test", "countries.test", "events.test",
+                 "timed_event_results.test", "scored_event_results.test")
+        resetCollections()
+        entities.load_data(*files)
+        loaded = describeCollections()
+        resetCollections()
+        games = entities.Dataset()
+        games.load_data(*files)
+        empty = entities.Dataset()
+        empty.load_data(*files[:3], "empty_results.test", "empty_results.test")
+        self.assertEqual(len(entities.all_athletes), 0)
+        self.assertEqual(len(games.athletes), len(empty.athletes))
+        self.assertIsNot(games.athletes.find_item("60"), empty.athletes.find_item("60"))
+        event_name = "Men's Speedskating 5000m"
+        self.assertEqual(len(games.events.find_item(event_name).get_athletes()), 3)
+        self.assertEqual(empty.events.find_item(event_name).get_athletes(), [])
+        self.assertIn("elapsed", games.get_load_stats())
+        with open("timed_event_results.test") as results:
+            first_row = results.readline()
+        with open("empty_results.test", "w") as results:
+            results.write(first_row)
+        feed = entities.ResultsFeed(["empty_results.test"], dataset=empty)
+        touched = feed.update()
+        self.assertEqual(len(touched), 1)
+        self.assertEqual(len(touched.pop().get_athletes()), 1)
+        self.assertEqual(len(entities.all_events), 0)
+        entities.default_dataset.load_data(*files)
+        self.assertEqual(describeCollections(), loaded)
+
+
+class RankingTests(A2TestClass):
+    """ Tests ranking an event's results"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 23
+        super(RankingTests, cls).setUpClass()
+
+    def testRankRows(self):
+        """ test ties share a place and are ordered by full name"""
+        country = entities.Country("Canada", "CAN")
+        for timed, values, expected in (
+                (True, [20.5, 10.0, 10.0, 30.0, 10.0], [5, 3, 2, 1, 4]),
+                (False, [20.5, 10.0, 10.0, 30.0, 10.0], [4, 1, 5, 3, 2])):
+            event = entities.Event("Event", "TIMED" if timed else "SCORED", [])
+            store = event.get_result_store()
+            for identifier, (surname, value) in enumerate(zip("EDCBA", values)):
+                athlete = entities.Athlete(str(identifier), "Name", surname, country)
+                event.add_athlete(athlete)
+                athlete.add_result(event, store.add(athlete, value))
+            rows, places = processing._rank_rows(store, timed)
+            self.assertEqual([row + 1 for row in rows], expected)
+            self.assertEqual(places, [1, 1, 1, 4, 5] if timed else [1, 2, 3, 3, 3])
+
+
+class DetermineAllPlacesTests(A2TestClass):
+    """ Tests ranking every event in one batch"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 24
+        super(DetermineAllPlacesTests, cls).setUpClass()
+        setUpTestFiles1()
+
+    @classmethod
+    def tearDownClass(cls):
+        tearDownTestFiles()
+
+    def testDetermineAllPlaces(self):
+        """ test the batch gives the same rankings and places as DeterminePlaces"""
+        resetCollections()
+        entities.load_data("athletes.test", "countries.test", "events.test",
+                           "timed_event_results.test", "scored_event_results.test")
+        expected = {}
+        for event in entities.all_events.get_items():
+            determine_places = processing.DeterminePlaces(event)
+            determine_places.process()
+            expected[event] = (determine_places.get_results(),
+                               list(event.get_result_store().places))
+        for workers in (None, 2):
+            for event in expected:
+                store = event.get_result_store()
+                for row in range(len(store.places)):
+                    store.places[row] = 0
+            counter = processing.DetermineAllPlaces._determine_all_places_counter
+            places_counter = processing.DeterminePlaces._determine_places_counter
+            processing_counter = processing.ProcessResults._processing_counter
+            determine_all_places = processing.DetermineAllPlaces(workers=workers)
+            determine_all_places.process()
+            self.assertEqual(processing.DetermineAllPlaces._determine_all_places_counter,
+                             counter + 1)
+            self.assertEqual(processing.DeterminePlaces._determine_places_counter,
+                             places_counter + len(expected))
+            self.assertEqual(processing.ProcessResults._processing_counter,
+                             processing_counter + 1 + len(expected))
+            results = determine_all_places.get_results()
+            self.assertEqual(set(results), set(expected))
+            for event, (ranked, places) in expected.items():
+                self.assertEqual(results[event], ranked)
+                self.assertEqual(list(event.get_result_store().places), places)
+        resetCollections()
+
+
+class StandingsTests(A2TestClass):
+    """ Tests keeping an event's places up to date incrementally"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 25
+        super(StandingsTests, cls).setUpClass()
+
+    def testStandings(self):
+        """ test adding, correcting and removing results re-places the event"""
+        country = entities.Country("Canada", "CAN")
+        event = entities.Event("Event", "TIMED", [])
+        athletes = [entities.Athlete(str(identifier), "Name", surname, country)
+                    for identifier, surname in enumerate("ABCDE")]
+        store = event.get_result_store()
+        for athlete, value in zip(athletes[:4], [10.0, 20.0, 20.0, 30.0]):
+            event.add_athlete(athlete)
+            athlete.add_event(event)
+            athlete.add_result(event, store.add(athlete, value))
+        standings = processing.Standings(event)
+        places = lambda: [athlete.get_result(event).get_place_number()
+                          for athlete in athletes[:4]]
+        self.assertEqual(places(), [1, 2, 2, 4])
+        self.assertEqual(standings.add_result(athletes[4], 5.0),
+                         set(athletes))
+        self.assertEqual(places(), [2, 3, 3, 5])
+        self.assertEqual(standings.add_result(athletes[2], 20.0), set())
+        self.assertEqual(standings.add_result(athletes[3], 15.0),
+                         {athletes[1], athletes[2], athletes[3]})
+        self.assertEqual(places(), [2, 4, 4, 3])
+        self.assertEqual(standings.remove_result(athletes[0]),
+                         set(athletes[:4]))
+        self.assertNotIn(event, athletes[0].results)
+        self.assertEqual(len(store), 4)
+        self.assertEqual(standings.get_results(),
+                         [athletes[4], athletes[3], athletes[1], athletes[2]])
+        determine_places = processing.DeterminePlaces(event)
+        determine_places.process()
+        self.assertEqual([athlete.get_result(event).get_place_number()
+                          for athlete in athletes[1:]], [3, 3, 2, 1])
+        self.assertRaises(KeyError, standings.remove_result, athletes[0])
+
+    def testCommandsAfterRemoval(self):
+        """ test the result commands run after a result is removed"""
+        setUpTestFiles1()
+        try:
+            resetCollections()
+            entities.load_data("athletes.test", "countries.test", "events.test",
+                               "timed_event_results.test", "scored_event_results.test")
+            processing.DetermineAllPlaces().process()
+            event = entities.all_events.find_item("Men's Aerials")
+            standings = processing.Standings(event)
+            first, second = standings.get_results()[:2]
+            standings.remove_result(first)
+            self.assertFalse(event.has_athlete(first))
+            self.assertFalse(first.has_event(event))
+            eventResults = processing.EventResults(event)
+            eventResults.process()
+            self.assertEqual(eventResults.get_results(), standings.get_results())
+            athleteResults = processing.AthleteResults(first)
+            athleteResults.process()
+            self.assertEqual(len(athleteResults.get_results()),
+                             len(first.get_events()))
+            countryResults = processing.CountryResults(first.get_country())
+            countryResults.process()
+            self.assertEqual(second.get_result(event).get_place_number(), 1)
+        finally:
+            tearDownTestFiles()
+
+
+class MedalTableTests(A2TestClass):
+    """ Tests summarising every country's results in one pass"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 26
+        super(MedalTableTests, cls).setUpClass()
+        setUpTestFiles1()
+
+    @classmethod
+    def tearDownClass(cls):
+        tearDownTestFiles()
+
+    def testMedalTable(self):
+        """ test the table matches CountryResults and is ranked by medals then name"""
+        resetCollections()
+        entities.load_data("athletes.test", "countries.test", "events.test",
+                           "timed_event_results.test", "scored_event_results.test")
+        medal_table = processing.MedalTable()
+        self.assertRaises(RuntimeError, medal_table.process)
+        processing.DetermineAllPlaces().process()
+        medal_table.process()
+        table = medal_table.get_results()
+        self.assertEqual(len(table), len(entities.all_countries))
+        for country, counts in table:
+            country_results = processing.CountryResults(country)
+            country_results.process()
+            self.assertEqual(counts, country_results.get_results())
+        keys = [([-count for count in counts[:3]], country.get_name())
+                for country, counts in table]
+        self.assertEqual(keys, sorted(keys))
+        resetCollections()
+
+
+class LiveMedalTableTests(A2TestClass):
+    """ Tests keeping the medal table up to date as places change"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 27
+        super(LiveMedalTableTests, cls).setUpClass()
+        setUpTestFiles1()
+
+    @classmethod
+    def tearDownClass(cls):
+        tearDownTestFiles()
+
+    def testLiveMedalTable(self):
+        """ test the live table follows DeterminePlaces and Standings"""
+        resetCollections()
+        entities.load_data("athletes.test", "countries.test", "events.test",
+                           "timed_event_results.test", "scored_event_results.test")
+        processing.DetermineAllPlaces().process()
+        live_table = processing.LiveMedalTable()
+        live_table.process()
+        try:
+            medal_table = processing.MedalTable()
+            medal_table.process()
+            self.assertEqual(live_table.get_results(), medal_table.get_results())
+            event = entities.all_events.find_item("Men's Speedskating 5000m")
+            last = processing.EventResults(event)
+            last.process()
+            last = last.get_results()[-1]
+            standings = processing.Standings(event)
+            self.assertIn(last, standings.add_result(last, 1.0))
+            medal_table.process()
+            self.assertEqual(live_table.get_results(), medal_table.get_results())
+            standings.remove_result(last)
+            processing.DeterminePlaces(event).process()
+            medal_table.process()
+            self.assertEqual(live_table.get_results(), medal_table.get_results())
+        finally:
+            live_table.close()
+        self.assertEqual(entities._place_observers, [])
+        resetCollections()
+
+    def testBatchedChanges(self):
+        """ test the places set by one DeterminePlaces reach the table as one batch"""
+        resetCollections()
+        canada = entities.Country("Canada", "CAN")
+        norway = entities.Country("Norway", "NOR")
+        entities.all_countries.add_items([("CAN", canada), ("NOR", norway)])
+        event = entities.Event("Event", "TIMED", [])
+        entities.all_events.add_item("Event", event)
+        store = event.get_result_store()
+        athletes = []
+        for identifier, country in enumerate((canada, norway)):
+            athlete = entities.Athlete(str(identifier), "Name", "Surname", country)
+            country.add_athlete(athlete)
+            event.add_athlete(athlete)
+            athlete.add_event(event)
+            athlete.add_result(event, store.add(athlete, 10.0 + identifier))
+            athletes.append(athlete)
+        processing.DeterminePlaces(event).process()
+        live_table = processing.LiveMedalTable()
+        live_table.process()
+        batches = []
+        entities.add_place_observer(batches.append)
+        try:
+            athletes[0].get_result(event).result_value = 12.0
+            processing.DeterminePlaces(event).process()
+            self.assertEqual(batches, [[(store, athletes[1], 2, 1), (store, athletes[0], 1, 2)]])
+            self.assertEqual(live_table.get_results(),
+                             [(norway, [1, 0, 0, 1]), (canada, [0, 1, 0, 1])])
+            with entities.batch_place_changes():
+                athletes[0].get_result(event).set_place(1)
+                self.assertEqual(len(batches), 1)
+            self.assertEqual(batches[1], [(store, athletes[0], 2, 1)])
+            self.assertEqual(live_table.get_results()[0], (canada, [1, 0, 0, 1]))
+        finally:
+            entities.remove_place_observer(batches.append)
+            live_table.close()
+        resetCollections()
+
+
+class LiveDatasetTests(A2TestClass):
+    """ Tests the live medal table of a dataset other than the globals"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 28
+        super(LiveDatasetTests, cls).setUpClass()
+        setUpTestFiles1()
+
+    @classmethod
+    def tearDownClass(cls):
+        tearDownTestFiles()
+
+    def testDatasetTable(self):
+        """ test the table counts and follows only the given events"""
+        files = ("athletes.test", "countries.test", "events.test",
+                 "timed_event_results.test", "scored_event_results.test")
+        resetCollections()
+        entities.load_data(*files)
+        games = entities.Dataset()
+        games.load_data(*files)
+        countries = games.countries.get_items()
+        events = games.events.get_items()
+        processing.DetermineAllPlaces(events).process()
+        event = games.events.find_item("Men's Luge")
+        live_table = processing.LiveMedalTable(countries, events)
+        live_table.process()
+        luge_table = processing.LiveMedalTable(countries, [event])
+        luge_table.process()
+        try:
+            medal_table = processing.MedalTable(countries, events)
+            medal_table.process()
+            self.assertEqual(live_table.get_results(), medal_table.get_results())
+            self.assertEqual(dict(live_table.get_results())[games.countries.find_item("AUS")],
+                             [1, 1, 4, 21])
+            processing.DetermineAllPlaces().process()
+            standings = processing.Standings(event)
+            standings.add_result(games.athletes.find_item("32"), 100.0)
+            moguls = games.events.find_item("Men's Moguls").get_result_store()
+            moguls.set_places(range(len(moguls)), [1] * len(moguls))
+            medal_table.process()
+            self.assertEqual(live_table.get_results(), medal_table.get_results())
+            luge_medals = processing.MedalTable(countries, [event])
+            luge_medals.process()
+            self.assertEqual(luge_table.get_results(), luge_medals.get_results())
+        finally:
+            live_table.close()
+            luge_table.close()
+        resetCollections()
+
+    def testNoChangeLost(self):
+        """ test places cannot change while an observer's first count is taken"""
+        store = entities.ResultStore()
+        athlete = entities.Athlete("1", "Name", "Surname", entities.Country("Canada", "CAN"))
+        store.append(athlete, 10.0, 2)
+        changes = []
+        seen = []
+        writer = threading.Thread(target=store.set_place, args=(0, 1))
+
+        def start():
+            writer.start()
+            writer.join(0.05)
+            seen.append((writer.is_alive(), store.places[0]))
+
+        entities.add_place_observer(changes.extend, start)
+        try:
+            writer.join()
+        finally:
+            entities.remove_place_observer(changes.extend)
+        self.assertEqual(seen, [(True, 2)])
+        self.assertEqual(changes, [(store, athlete, 2, 1)])
+
+    def testObserversCalledUnlocked(self):
+        """ test other threads can set places while an observer is called"""
+        store = entities.ResultStore()
+        athlete = entities.Athlete("1", "Name", "Surname", entities.Country("Canada", "CAN"))
+        store.append(athlete, 10.0, 2)
+        store.append(athlete, 11.0, 3)
+        seen = []
+
+        def observer(changes):
+            if changes[0][3] == 1:
+                writer = threading.Thread(target=store.set_place, args=(1, 2))
+                writer.start()
+                writer.join(1)
+                seen.append(writer.is_alive())
+
+        entities.add_place_observer(observer)
+        try:
+            store.set_place(0, 1)
+        finally:
+            entities.remove_place_observer(observer)
+        self.assertEqual(seen, [False])
+        self.assertEqual(list(store.places), [1, 2])
+        self.assertEqual(entities._places_watched, 0)
+
+
+class MmapLoadTests(A2TestClass):
+    """ Tests loading results through memory maps"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 29
+        super(MmapLoadTests, cls).setUpClass()
+        setUpTestFiles1()
+
+    @classmethod
+    def tearDownClass(cls):
+        tearDownTestFiles()
+
+    def testLoadData(self):
+        """ test load_data with use_mmap gives the same entities"""
+        files = ("athletes.test", "countries.test", "events.test",
+                 "timed_event_results.test", "scored_event_results.test")
+        resetCollections()
+        entities.load_data(*files)
+        loaded = describeCollections()
+        for block in (entities._MAP_BLOCK, 1, 100):
+            entities._MAP_BLOCK, saved = block, entities._MAP_BLOCK
+            try:
+                resetCollections()
+                entities.load_data(*files, use_mmap=True)
+            finally:
+                entities._MAP_BLOCK = saved
+            self.assertEqual(describeCollections(), loaded)
+
+
+class SlotsTests(A2TestClass):
+    """ Tests the slotted entity classes"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 30
+        super(SlotsTests, cls).setUpClass()
+
+    def testWeakReferences(self):
+        """ test entities have no __dict__ but can be weakly referenced"""
+        country = entities.Country("Canada", "CAN")
+        athlete = entities.Athlete("1", "Jane", "Doe", country)
+        event = entities.Event("Event 1", "TIMED", [athlete])
+        result = entities.Result(10.0)
+        for entity in (country, athlete, event, result):
+            self.assertFalse(hasattr(entity, "__dict__"))
+            self.assertIs(weakref.ref(entity)(), entity)
+
+
+class ResultStoreTests(A2TestClass):
+    """ Tests moving results into and out of their event's ResultStore"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.test_no = 31
+        super(ResultStoreTests, cls).setUpClass()
+
+    def testStandaloneResult(self):
+        """ test a result holds its value and place until it is added"""
+        country = entities.Country("Canada", "CAN")
+        athlete = entities.Athlete("1", "Jane", "Doe", country)
+        event = entities.Event("Event 1", "TIMED", [athlete])
+        result = entities.Result(10.5)
+        result.set_place(3)
+        self.assertIsNone(result._store)
+        athlete.add_result(event, result)
+        store = event.get_result_store()
+        self.assertIs(result._store, store)
+        self.assertEqual((list(store.values), list(store.places)), ([10.5], [3]))
+        athlete.add_result(event, entities.Result(9.5))
+        self.assertIsNone(result._store)
+        self.assertEqual((result.get_value(), result.get_place_number()), (10.5, 3))
+        self.assertEqual(list(store.values), [9.5])
+
+    def testSharedResult(self):
+        """ test one result cannot be added for two athletes or events"""
+        country = entities.Country("Canada", "CAN")
+        athlete1 = entities.Athlete("1", "Jane", "Doe", country)
+        athlete2 = entities.Athlete("2", "John", "Doe", country)
+        event1 = entities.Event("Event 1", "TIMED", [athlete1, athlete2])
+        event2 = entities.Event("Event 2", "TIMED", [athlete1])
+        result = entities.Result(10.5)
+        athlete1.add_result(event1, result)
+        athlete1.add_result(event1, result)
+        self.assertRaises(ValueError, athlete2.add_result, event1, result)
+        self.assertRaises(ValueError, athlete1.add_result, event2, result)
+        athlete2.add_result(event1, entities.Result(9.5))
+        determine_places = processing.DeterminePlaces(event1)
+        determine_places.process()
+        self.assertEqual(determine_places.get_results(), [athlete2, athlete1])
+        self.assertEqual(len(event2.get_result_store()), 0)
+
+
 class AssignmentMaster(TestMaster):
     """ Runs the tests """
 
@@ -579,7 +1762,30 @@ class AssignmentMaster(TestMaster):
             EventResultsTests,
             CountryResultsTests,
             DeterminePlacesTests,
-            LoadDataTests
+            LoadDataTests,
+            StreamCountryResultsTests,
+            SnapshotTests,
+            ResultsFeedTests,
+            ManagedDictionaryTests,
+            NumpyLoadTests,
+            ShardedResultsTests,
+            LazyLoadTests,
+            MembershipTests,
+            ReadOnlyViewTests,
+            ItemIdTests,
+            NumericResultTests,
+            BulkLoadTests,
+            IndexTests,
+            DatasetTests,
+            RankingTests,
+            DetermineAllPlacesTests,
+            StandingsTests,
+            MedalTableTests,
+            LiveMedalTableTests,
+            LiveDatasetTests,
+            MmapLoadTests,
+            SlotsTests,
+            ResultStoreTests
         ]
 
         for test_case in self._tests: